@@ -1,18 +1,33 @@
 """DT holds the DecisionTree object."""
+import struct
+import sys
+from array import array
+from collections import defaultdict, deque
+from multiprocessing import Pool
+from operator import itemgetter
 
+from all_exceptions import LogicError
+from attribute import NumericAttribute
 from classifier import Classifier
+from dataset import entropy, table_gain
+from example import Examples, MatrixExamples, class_typecode
 
 
 class Node(object):
     """Node of a decision tree."""
 
-    def __init__(self, attribute=None, classlabel=None, is_leaf=False):
-        """Put attribute for node along with classlabel if leaf node."""
+    def __init__(self, attribute=None, classlabel=None, is_leaf=False, threshold=None):
+        """Put attribute for node along with classlabel if leaf node.
+
+        Nodes splitting on a numeric attribute have a `threshold`, their
+        children have attribute_val 0 (value <= threshold) and 1.
+        """
         self._children = []
         self._attribute = attribute
         self.attribute_val = None
         self._is_leaf = is_leaf
         self.classlabel = classlabel
+        self.threshold = threshold
 
     def __getitem__(self, val):
         """Allow for indexing."""
@@ -20,6 +35,12 @@ class Node(object):
             if child.attribute_val == val:
                 return child
 
+    def branch(self, value):
+        """Return the attribute_val of the child that `value` goes to."""
+        if self.threshold is None:
+            return value
+        return 0 if value <= self.threshold else 1
+
     @property
     def children(self):
         """Return array of children."""
@@ -39,52 +60,672 @@ class Node(object):
         """Append a node to children."""
         return self.children.append(child)
 
+    def make_leaf(self):
+        """Drop the children, the node predicts its classlabel."""
+        self._children = []
+        self._attribute = None
+        self.threshold = None
+        self._is_leaf = True
+
     def __repr__(self):
         """Representation of a classlabel."""
         string = "%s\t%s" % (str(self.attribute), str(self.attribute_val))
         return string
 
 
+class IndexedExamples(object):
+    """One shared row store for building a tree on row-index arrays.
+
+    The tree reads the matrix and class arrays of a MatrixExamples in
+    place (other Examples are packed into one first); every node of the
+    tree then refers to its examples by an array of row indices into this
+    store, so no DataSet or Examples is created per node.
+
+    A node's examples are a subset, an (indices, orders) pair: `indices`
+    is the index array of its rows and `orders` maps each numeric
+    attribute to the same rows sorted by that attribute. Numeric columns
+    are sorted once for the root and partitions keep the sorted order, so
+    no node sorts again.
+
+    Attributes
+    ----------
+        attributes (Attributes): attributes of the rows
+        classindex (int): index of the class value in each row
+        matrix (array): row-major non-class values, `width` per row
+        classes (array): class value of each row
+        width (int): number of non-class values per row
+        numeric (list): indexes of the numeric non-class attributes
+    """
+
+    def __init__(self, dataset):
+        """Use the arrays of `dataset`'s examples, packing them if needed."""
+        self.attributes = dataset.attributes
+        self.classindex = dataset.attributes.classindex
+        examples = dataset.examples
+        if not isinstance(examples, MatrixExamples):
+            packed = MatrixExamples(self.attributes)
+            for values in examples.rows():
+                packed.append(list(values))
+            examples = packed
+        self.matrix = examples.matrix
+        self.classes = examples.classes
+        self.width = examples.width
+        self.numeric = [i for i, a in enumerate(self.attributes)
+                        if i != self.classindex and isinstance(a, NumericAttribute)]
+        self._branch = array('l', [0]) * self.size
+
+    @property
+    def size(self):
+        """Return number of rows."""
+        return len(self.classes)
+
+    def all_indices(self):
+        """Return an index array of every row."""
+        return array('l', xrange(self.size))
+
+    def root(self):
+        """Return the subset of every row, numeric attributes presorted."""
+        matrix, width = self.matrix, self.width
+        orders = {}
+        for i in self.numeric:
+            orders[i] = array('l', sorted(xrange(self.size), key=lambda r: matrix[r * width + i]))
+        return self.all_indices(), orders
+
+    def contingency_tables(self, indices, attributeindexes):
+        """Count class labels and (value, class label) pairs of `indices` in one pass.
+
+        Returns (class_counts, tables) as DataSet.contingency_tables does.
+        """
+        matrix, classes, width = self.matrix, self.classes, self.width
+        class_counts = defaultdict(int)
+        tables = dict((i, defaultdict(int)) for i in attributeindexes)
+        columns = [(i, tables[i]) for i in attributeindexes]
+        for r in indices:
+            base = r * width
+            classlabel = classes[r]
+            class_counts[classlabel] += 1
+            for i, table in columns:
+                table[(matrix[base + i], classlabel)] += 1
+        return class_counts, tables
+
+    def best_threshold(self, order, attributeindex, class_counts):
+        """Return (gain, threshold) of the best binary split of a numeric attribute.
+
+        One scan over `order`, the rows sorted by the attribute, moving one
+        row at a time from the right side of the split to the left side.
+        Thresholds are midpoints between consecutive distinct values.
+        """
+        matrix, classes, width = self.matrix, self.classes, self.width
+        n = float(len(order))
+        base = entropy(class_counts.values())
+        left = defaultdict(int)
+        right = dict(class_counts)
+        best_gain, best_threshold = 0.0, None
+        for k in xrange(len(order) - 1):
+            r = order[k]
+            classlabel = classes[r]
+            left[classlabel] += 1
+            right[classlabel] -= 1
+            value = matrix[r * width + attributeindex]
+            following = matrix[order[k + 1] * width + attributeindex]
+            if value == following:
+                continue
+            n_left = k + 1
+            gain = (base - n_left / n * entropy(left.values()) -
+                    (n - n_left) / n * entropy(right.values()))
+            if best_gain < gain:
+                best_gain, best_threshold = gain, (value + following) / 2.0
+        return best_gain, best_threshold
+
+    def partition(self, subset, attributeindex, threshold=None):
+        """Split a subset by a nominal value, or a numeric `threshold`, in one pass.
+
+        Returns [(attribute_val, subset)] for every branch in order: one per
+        domain value of a nominal attribute, or <= threshold and
+        > threshold for a numeric one. Each branch's numeric orders stay
+        sorted.
+        """
+        indices, orders = subset
+        matrix, width = self.matrix, self.width
+        branch = self._branch
+        if threshold is None:
+            n_parts = len(self.attributes[attributeindex].domain)
+            for r in indices:
+                branch[r] = int(matrix[r * width + attributeindex])
+        else:
+            n_parts = 2
+            for r in indices:
+                branch[r] = 0 if matrix[r * width + attributeindex] <= threshold else 1
+        parts = [array('l') for _ in xrange(n_parts)]
+        for r in indices:
+            parts[branch[r]].append(r)
+        part_orders = [{} for _ in xrange(n_parts)]
+        for i, order in orders.iteritems():
+            sorted_parts = [array('l') for _ in xrange(n_parts)]
+            for r in order:
+                sorted_parts[branch[r]].append(r)
+            for part_order, sorted_part in zip(part_orders, sorted_parts):
+                part_order[i] = sorted_part
+        return list(enumerate(zip(parts, part_orders)))
+
+
+def majority(class_counts):
+    """Return the most frequent class label, the smallest one on ties."""
+    if not class_counts:
+        return None
+    return max(sorted(class_counts.iteritems()), key=itemgetter(1))[0]
+
+
+class CompiledTree(object):
+    """A trained decision tree flattened into parallel arrays.
+
+    Node 0 is the root. For node k, attributes[k] is its split attribute
+    (-1 for a leaf), thresholds[k] its numeric threshold (NaN for nominal
+    splits) and labels[k] its majority class label. Its children are
+    children[offsets[k]:offsets[k] + counts[k]], indexed by attribute_val.
+    The arrays double as a compact file format (see save/load).
+
+    Classifying runs a function generated from the arrays, nested ifs
+    with the thresholds and labels as constants (see _router). Trees
+    deeper than SOURCE_DEPTH walk the arrays in a loop instead.
+
+    Attributes
+    ----------
+        attributes (array): split attribute of each node
+        thresholds (array): threshold of each node
+        labels (array): class label of each node
+        offsets (array): first entry of each node in children
+        counts (array): number of children of each node
+        children (array): child node ids
+    """
+
+    MAGIC = 'BPPT'
+    VERSION = 1
+    FIELDS = ('attributes', 'thresholds', 'labels', 'offsets', 'counts', 'children')
+    SOURCE_DEPTH = 40  # generated code nests a block per level, the parser allows 100
+    _HEADER = struct.Struct('<4sIQQcB6x')
+
+    def __init__(self, typecode='l'):
+        """Empty tree, `typecode` is the array typecode of class labels."""
+        self.attributes = array('i')
+        self.thresholds = array('d')
+        self.labels = array(typecode)
+        self.offsets = array('i')
+        self.counts = array('i')
+        self.children = array('i')
+        self._route = None
+
+    @classmethod
+    def from_node(cls, root, typecode='l'):
+        """Flatten the tree below the Node `root`, breadth first."""
+        tree = cls(typecode)
+        missing = -1 if typecode == 'l' else float('nan')
+        queue = deque([root])
+        next_id = 1
+        while queue:
+            node = queue.popleft()
+            leaf = node.is_leaf or node.attribute is None or not node.children
+            tree.attributes.append(-1 if leaf else node.attribute)
+            tree.thresholds.append(float('nan') if node.threshold is None else node.threshold)
+            tree.labels.append(missing if node.classlabel is None else node.classlabel)
+            tree.offsets.append(len(tree.children))
+            children = [] if leaf else sorted(node.children, key=lambda c: c.attribute_val)
+            tree.counts.append(len(children))
+            for child in children:
+                tree.children.append(next_id)
+                next_id += 1
+                queue.append(child)
+        return tree
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Build a tree around the arrays of `arrays`, a dict keyed by FIELDS."""
+        tree = cls(arrays['labels'].typecode)
+        for name in cls.FIELDS:
+            setattr(tree, name, arrays[name])
+        n = tree.size
+        if any(len(getattr(tree, name)) != n for name in cls.FIELDS[:-1]):
+            raise LogicError("Compiled tree arrays differ in length.")
+        return tree
+
+    def arrays(self):
+        """Return [(name, array)] of the arrays in FIELDS order."""
+        return [(name, getattr(self, name)) for name in self.FIELDS]
+
+    def to_node(self):
+        """Rebuild the Node tree, the inverse of from_node."""
+        nodes = []
+        for k in xrange(self.size):
+            leaf = self.attributes[k] < 0
+            label = self.labels[k]
+            if label != label or (label == -1 and self.labels.typecode == 'l'):
+                label = None  # from_node stores a missing label as -1 or NaN
+            threshold = self.thresholds[k]
+            nodes.append(Node(attribute=None if leaf else self.attributes[k], classlabel=label,
+                              is_leaf=leaf,
+                              threshold=threshold if threshold == threshold else None))
+        for k, node in enumerate(nodes):
+            start = self.offsets[k]
+            for attribute_val, child in enumerate(self.children[start:start + self.counts[k]]):
+                nodes[child].attribute_val = attribute_val
+                node.append(nodes[child])
+        return nodes[0] if nodes else None
+
+    @property
+    def size(self):
+        """Return number of nodes."""
+        return len(self.attributes)
+
+    def depth(self):
+        """Return the number of levels below the root."""
+        deepest = 0
+        stack = [(0, 0)] if self.size else []
+        while stack:
+            node, depth = stack.pop()
+            deepest = max(deepest, depth)
+            start = self.offsets[node]
+            stack.extend((child, depth + 1)
+                         for child in self.children[start:start + self.counts[node]])
+        return deepest
+
+    def source(self):
+        """Return Python source of classify(m, b), the label of the row at m[b:].
+
+        Nominal values are compared with the branch indices, a value no
+        branch was trained on returns the label of the node it stops at.
+        """
+        def label(node):
+            value = self.labels[node]
+            return 'NAN' if value != value else repr(value)
+        lines = ['def classify(m, b):']
+        stack = [(0, 1)]
+        while stack:
+            item, indent = stack.pop()
+            if isinstance(item, str):
+                lines.append('    ' * indent + item)
+                continue
+            pad = '    ' * indent
+            attributeindex = self.attributes[item]
+            if attributeindex < 0:
+                lines.append('%sreturn %s' % (pad, label(item)))
+                continue
+            start = self.offsets[item]
+            children = self.children[start:start + self.counts[item]]
+            threshold = self.thresholds[item]
+            todo = []
+            if threshold == threshold:
+                lines.append('%sif m[b + %d] <= %r:' % (pad, attributeindex, threshold))
+                todo = [(children[0], indent + 1), ('else:', indent), (children[1], indent + 1)]
+            else:
+                lines.append('%sx = m[b + %d]' % (pad, attributeindex))
+                for branch, child in enumerate(children):
+                    todo.append(('%s x == %d:' % ('elif' if branch else 'if', branch), indent))
+                    todo.append((child, indent + 1))
+                todo.append(('return %s' % label(item), indent))
+            stack.extend(reversed(todo))
+        return "\n".join(lines) + "\n"
+
+    def _router(self):
+        """Return the compiled classify(m, b) of source(), None for deep trees."""
+        if self._route is None:
+            self._route = False
+            if self.size and self.depth() <= self.SOURCE_DEPTH:
+                namespace = {'NAN': float('nan')}
+                exec compile(self.source(), '<CompiledTree>', 'exec') in namespace
+                self._route = namespace['classify']
+        return self._route
+
+    def classify_values(self, values):
+        """Route one row of values from the root to a leaf, return its label."""
+        route = self._router()
+        if route:
+            return route(values, 0)
+        attributes, thresholds = self.attributes, self.thresholds
+        offsets, counts, children = self.offsets, self.counts, self.children
+        node = 0
+        attributeindex = attributes[0]
+        while attributeindex >= 0:
+            threshold = thresholds[node]
+            value = values[attributeindex]
+            if threshold == threshold:  # not NaN, a numeric split
+                branch = 0 if value <= threshold else 1
+            else:
+                branch = int(value)
+            if not 0 <= branch < counts[node]:  # value never seen in training
+                break
+            node = children[offsets[node] + branch]
+            attributeindex = attributes[node]
+        return self.labels[node]
+
+    def classify_batch(self, data):
+        """Return the class label of every row of a DataSet, Examples or list of rows."""
+        examples = getattr(data, 'examples', data)
+        if isinstance(examples, MatrixExamples):
+            return self._classify_matrix(examples)
+        rows = examples.rows() if isinstance(examples, Examples) else examples
+        classify = self.classify_values
+        return [classify(values) for values in rows]
+
+    def _classify_matrix(self, examples):
+        """Route every row of a MatrixExamples straight from its matrix."""
+        matrix, width = examples.matrix, examples.width
+        route = self._router()
+        if route:
+            return [route(matrix, base) for base in xrange(0, examples.size * width, width)]
+        attributes, thresholds, labels = self.attributes, self.thresholds, self.labels
+        offsets, counts, children = self.offsets, self.counts, self.children
+        root_attribute = attributes[0]
+        results = []
+        for base in xrange(0, examples.size * width, width):
+            node = 0
+            attributeindex = root_attribute
+            while attributeindex >= 0:
+                threshold = thresholds[node]
+                value = matrix[base + attributeindex]
+                if threshold == threshold:
+                    branch = 0 if value <= threshold else 1
+                else:
+                    branch = int(value)
+                if not 0 <= branch < counts[node]:
+                    break
+                node = children[offsets[node] + branch]
+                attributeindex = attributes[node]
+            results.append(labels[node])
+        return results
+
+    def save(self, path):
+        """Write the tree to `path`."""
+        with open(path, 'wb') as f:
+            f.write(self._HEADER.pack(self.MAGIC, self.VERSION, self.size, len(self.children),
+                                      self.labels.typecode, self.labels.itemsize))
+            for _, values in self.arrays():
+                if sys.byteorder == 'big':
+                    values = array(values.typecode, values)
+                    values.byteswap()
+                values.tofile(f)
+
+    @classmethod
+    def load(cls, path):
+        """Read a tree written by `save`."""
+        with open(path, 'rb') as f:
+            magic, version, size, n_children, typecode, itemsize = cls._HEADER.unpack(
+                f.read(cls._HEADER.size))
+            if magic != cls.MAGIC or version != cls.VERSION:
+                raise LogicError("Not a version %s compiled tree." % cls.VERSION)
+            tree = cls(typecode)
+            if tree.labels.itemsize != itemsize:
+                raise LogicError("Compiled tree was written with different item sizes.")
+            for name, values in tree.arrays():
+                values.fromfile(f, n_children if name == 'children' else size)
+                if sys.byteorder == 'big':
+                    values.byteswap()
+        return tree
+
+
+def size(node):
+    """Return the number of nodes in the tree below `node`."""
+    count = 0
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        count += 1
+        stack.extend(node.children)
+    return count
+
+
+_shared = None
+
+
+def _init_worker(tree, examples, attributeindexes):
+    """Keep the tree builder and row store in the worker, runs once per process."""
+    global _shared
+    _shared = (tree, examples, attributeindexes)
+
+
+def _build_subtree(task):
+    """Build the subtree of a (subset, depth) task in a worker process.
+
+    It is sent back as a CompiledTree, flat arrays pickle without
+    recursing through the nodes.
+    """
+    tree, examples, attributeindexes = _shared
+    subset, depth = task
+    subtree = tree._build(examples, subset, attributeindexes, depth)
+    return CompiledTree.from_node(subtree, examples.classes.typecode)
+
+
 class DecisionTree(Classifier):
     """ID3 decision tree classification model."""
 
     model = "ID3"
 
+    def __init__(self, trainset=None, n_jobs=1, max_depth=None, min_samples_split=2,
+                 min_gain=0.0):
+        """Initialize with the training set.
+
+        Args:
+            trainset (DataSet): training dataset
+            n_jobs (int): processes used to build subtrees, the tree is the
+                same as with one process.
+            max_depth (int): deepest level that is split, the root is level 0
+                and None grows until the leaves are pure.
+            min_samples_split (int): fewest examples a node needs to be split.
+            min_gain (float): a split must gain more than this.
+        """
+        self.trainset = trainset
+        self.n_jobs = n_jobs
+        self.max_depth = max_depth
+        self.min_samples_split = min_samples_split
+        self.min_gain = min_gain
+        self.root = None
+        self.compiled = None
+
     def classify(self, example):
         """Classify."""
         classification = self._classify(example, self.root)
         return classification
 
     def _classify(self, example, node):
-        if node.is_leaf:
-            return node.classlabel
-        if node.attribute is None:
-            return node.classlabel
-        child_node = node[example[node.attribute]]
-        return self._classify(example, child_node)
-
-    def train(self, example):
-        """Run training, needs to be overloaded for recursion."""
+        """Walk from `node` to a leaf in a loop, return its class label.
+
+        A value no branch was trained on stops at the current node's
+        majority label, as in CompiledTree.
+        """
+        while not node.is_leaf and node.attribute is not None:
+            child = node[node.branch(example[node.attribute])]
+            if child is None:  # value never seen in training
+                break
+            node = child
+        return node.classlabel
+
+    def classify_batch(self, dataset):
+        """Classify every example of `dataset` with the compiled tree."""
+        if self.compiled is None:
+            self.compile()
+        return self.compiled.classify_batch(dataset)
+
+    def compile(self):
+        """Flatten the trained tree into a CompiledTree, returns it."""
+        if self.root is None:
+            raise LogicError("DecisionTree.compile called before train.")
+        self.compiled = CompiledTree.from_node(self.root, class_typecode(self.trainset.attributes))
+        return self.compiled
+
+    def get_state(self):
+        """Return the build settings and the compiled tree arrays."""
+        compiled = self.compiled or self.compile()
+        params = {'n_jobs': self.n_jobs, 'max_depth': self.max_depth,
+                  'min_samples_split': self.min_samples_split, 'min_gain': self.min_gain}
+        return params, compiled.arrays()
+
+    def set_state(self, params, arrays):
+        """Restore the tree from the arrays of get_state."""
+        self.n_jobs = params['n_jobs']
+        self.max_depth = params['max_depth']
+        self.min_samples_split = params['min_samples_split']
+        self.min_gain = params['min_gain']
+        self.compiled = CompiledTree.from_arrays(arrays)
+        self.root = self.compiled.to_node()
+
+    def train(self, dataset=None, holdout=None):
+        """Build the tree from the training set, prune it on `holdout` if given."""
+        if dataset:
+            self.trainset = dataset
         self.root = self._train(self.trainset)
+        self.compiled = None
+        if holdout is not None:
+            self.prune(holdout)
+
+    def prune(self, holdout):
+        """Reduced-error pruning on the examples of the DataSet `holdout`.
+
+        Every holdout example is routed from the root and charged to each
+        node it passes that would misclassify it as a leaf. Working bottom
+        up, a subtree becomes a leaf when that makes no more holdout errors
+        than its children do. Returns the number of nodes removed.
+        """
+        classindex = holdout.attributes.size - 1
+        errors = defaultdict(int)
+        for example in holdout.examples:
+            values = example.values
+            label = values[classindex]
+            node = self.root
+            while node is not None:
+                if node.classlabel != label:
+                    errors[id(node)] += 1
+                if node.is_leaf or node.attribute is None:
+                    break
+                node = node[node.branch(values[node.attribute])]
+        removed = 0
+        subtree_errors = {}
+        stack = [(self.root, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if node.is_leaf or node.attribute is None:
+                subtree_errors[id(node)] = errors[id(node)]
+            elif not expanded:
+                stack.append((node, True))
+                stack.extend((child, False) for child in node.children)
+            else:
+                below = sum(subtree_errors.pop(id(child)) for child in node.children)
+                if errors[id(node)] <= below:
+                    removed += size(node) - 1
+                    node.make_leaf()
+                    below = errors[id(node)]
+                subtree_errors[id(node)] = below
+        self.compiled = None
+        return removed
 
     def _train(self, dataset):
-        """Recursive train create."""
-        if dataset.is_homogenous() or dataset.attributes_size <= 1:
-            highest_frequency_class = dataset.highest_freq_classlabel()
-            return Node(classlabel=highest_frequency_class, is_leaf=True)
-        elif dataset.examples_size == 0 or dataset.attributes_size == 0 or dataset is None:
-            return
-        else:
-            node = Node(attribute=dataset.get_best_split_attribute(), is_leaf=False)
-            splits = dataset.split_on_attribute(node.attribute)
-            for split, attribute_val in splits:
-                current_child = self._train(split)
-                if current_child:
-                    current_child.attribute_val = attribute_val
-                    node.append(current_child)
+        """Build a tree over an index array of every example of `dataset`."""
+        examples = IndexedExamples(dataset)
+        attributeindexes = [i for i in xrange(examples.attributes.size)
+                            if i != examples.classindex]
+        if self.n_jobs > 1:
+            return self._build_parallel(examples, examples.root(), attributeindexes)
+        return self._build(examples, examples.root(), attributeindexes)
+
+    def _make_node(self, examples, subset, attributeindexes, depth=0):
+        """Return the node for `subset` at level `depth` and the subsets of its branches.
+
+        Nominal attributes are scored from the node's contingency tables,
+        numeric ones by a threshold scan over their sorted order. Leaves
+        come back with no branches, an empty branch is None.
+        """
+        indices, orders = subset
+        if ((self.max_depth is not None and depth >= self.max_depth) or
+                len(indices) < self.min_samples_split):
+            class_counts, _ = examples.contingency_tables(indices, [])
+            return Node(classlabel=majority(class_counts), is_leaf=True), []
+        nominal = [i for i in attributeindexes if i not in orders]
+        class_counts, tables = examples.contingency_tables(indices, nominal)
+        classlabel = majority(class_counts)
+        if len(class_counts) <= 1 or not attributeindexes:
+            return Node(classlabel=classlabel, is_leaf=True), []
+        n = float(len(indices))
+        best_gain, best_attributeindex, best_threshold = self.min_gain, None, None
+        for attributeindex in attributeindexes:
+            if attributeindex in orders:
+                gain, threshold = examples.best_threshold(orders[attributeindex],
+                                                          attributeindex, class_counts)
+            else:
+                gain, threshold = table_gain(tables[attributeindex], class_counts, n), None
+            if best_gain < gain:
+                best_gain, best_attributeindex, best_threshold = gain, attributeindex, threshold
+        if best_attributeindex is None:  # no attribute gains more than min_gain
+            return Node(classlabel=classlabel, is_leaf=True), []
+        node = Node(attribute=best_attributeindex, classlabel=classlabel, is_leaf=False,
+                    threshold=best_threshold)
+        parts = [(attribute_val, part if len(part[0]) else None) for attribute_val, part
+                 in examples.partition(subset, best_attributeindex, best_threshold)]
+        return node, parts
+
+    def _build(self, examples, subset, attributeindexes, depth=0):
+        """Build the subtree of the rows in `subset` at level `depth`.
+
+        Nodes are expanded depth first from an explicit stack, so deep
+        trees do not run into the recursion limit.
+        """
+        root, parts = self._make_node(examples, subset, attributeindexes, depth)
+        stack = [(root, parts, depth)]
+        while stack:
+            node, parts, depth = stack.pop()
+            for attribute_val, part in parts:
+                if part is None:
+                    child, child_parts = Node(classlabel=node.classlabel, is_leaf=True), []
+                else:
+                    child, child_parts = self._make_node(examples, part, attributeindexes,
+                                                         depth + 1)
+                child.attribute_val = attribute_val
+                node.append(child)
+                if child_parts:
+                    stack.append((child, child_parts, depth + 1))
+        return root
+
+    def _build_parallel(self, examples, subset, attributeindexes):
+        """Build the top levels here and the subtrees below them in a process pool.
+
+        Levels are expanded breadth first until there are a few subtrees per
+        process. The workers inherit the row store when the pool starts and
+        each builds whole subtrees from subsets, so the result is the
+        same tree `_build` makes.
+        """
+        root, parts = self._make_node(examples, subset, attributeindexes)
+        frontier = [(root, attribute_val, part) for attribute_val, part in parts]
+        depth = 1
+        while frontier and len(frontier) < 4 * self.n_jobs:
+            level = []
+            for parent, attribute_val, part in frontier:
+                if part is None:
+                    child, child_parts = Node(classlabel=parent.classlabel, is_leaf=True), []
                 else:
-                    node._is_leaf = True
-            highest_frequency_class = dataset.highest_freq_classlabel()
-            node.classlabel = highest_frequency_class
-            # The root is saved to keep _classify consistent
-            return node
+                    child, child_parts = self._make_node(examples, part, attributeindexes,
+                                                         depth)
+                child.attribute_val = attribute_val
+                parent.append(child)
+                level.extend((child, val, p) for val, p in child_parts)
+            frontier = level
+            depth += 1
+        pending = []
+        for parent, attribute_val, part in frontier:
+            if part is None:
+                child = Node(classlabel=parent.classlabel, is_leaf=True)
+                child.attribute_val = attribute_val
+                parent.append(child)
+            else:
+                placeholder = Node(is_leaf=True)
+                parent.append(placeholder)
+                pending.append((parent, len(parent.children) - 1, attribute_val, part))
+        if pending:
+            pool = Pool(self.n_jobs, _init_worker, (self, examples, attributeindexes))
+            try:
+                subtrees = pool.map(_build_subtree,
+                                    [(part, depth) for _, _, _, part in pending])
+            finally:
+                pool.close()
+                pool.join()
+            for (parent, position, attribute_val, _), subtree in zip(pending, subtrees):
+                child = subtree.to_node()
+                child.attribute_val = attribute_val
+                parent.children[position] = child
+        return root
@@ -76,9 +76,24 @@ class BinaryAttribute(Attribute):
 
 
 class NominalAttribute(Attribute):
-    """An attribute with nominal representation."""
+    """An attribute with nominal representation.
 
-    domain = []
+    Keeps a value -> index map in sync with the domain so looking up the
+    index of a value doesn't walk the domain.
+    """
+
+    @property
+    def domain(self):
+        """Return the list of nominal values."""
+        return self._domain
+
+    @domain.setter
+    def domain(self, values):
+        """Set the nominal values and rebuild the value -> index map."""
+        self._domain = list(values)
+        self._indices = {}
+        for i, v in enumerate(self._domain):
+            self._indices.setdefault(v, i)
 
     @property
     def size(self):
@@ -93,27 +108,31 @@ class NominalAttribute(Attribute):
         """Allow for indexing."""
         return self.domain[val]
 
+    def __contains__(self, value):
+        """Return True if `value` is in the domain."""
+        return value in self._indices
+
     def __str__(self):
         """The string repr. of an Attribute is it's name."""
-        string = "@attribute %s" % self.name
-        for v in self.domain:
-            string = string + " %s" % v
-        return string
+        return " ".join(["@attribute %s" % self.name] + [str(v) for v in self.domain])
 
     def add_value(self, value):
         """Add a new nominal value to the domain of this nominal attribute."""
         try:
-            if value not in self.domain:
-                self.domain.append(value)
-        except:
+            if value not in self._indices:
+                self._indices[value] = len(self._domain)
+                self._domain.append(value)
+        except TypeError:
             e = 'Error with adding value: %s.' % value
             raise exceptions.LogicError(e)
 
     def index(self, value):
         """Return the index of the `value` for this nominal attribute."""
-        for i, k in enumerate(self):
-            if k == value:
-                return i
+        try:
+            return self._indices[value]
+        except KeyError:
+            e = "Value %s is not in the domain of attribute %s." % (value, self.name)
+            raise exceptions.LogicError(e)
 
 
 class NumericAttribute(Attribute):
@@ -35,10 +35,16 @@ class Attributes(object):
 
     def __str__(self):
         """String representation of Attributes."""
-        string = ""
-        for a in self.attributes:
-            string = string + str(a) + "\n"
-        return string
+        return "".join(str(a) + "\n" for a in self.attributes)
+
+    @classmethod
+    def from_string(cls, text):
+        """Return Attributes parsed from the `@attribute` lines in `text`."""
+        attributes = cls()
+        for line in text.split("\n"):
+            if '@attribute' in line:
+                attributes.parse(line)
+        return attributes
 
     @property
     def size(self):
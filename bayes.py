@@ -6,6 +6,7 @@ Implementatino of NaiveBayes classifier object.
 import math
 from collections import defaultdict
 
+from all_exceptions import LogicError
 from classifier import Classifier
 
 
@@ -24,27 +25,81 @@ def standard_deviation(vals):
 class NaiveBayes(Classifier):
     """NaiveBayes classifier."""
 
+    model = "Naive Bayes"
+
     def __init__(self, trainset, testset=None):
         """Initialize with dataset."""
         self.trainset = trainset
         self.testset = testset
-        self.total_examples = self.train_set.examples.size
-
-    def count_values(self):
-        """Count each value for all training sets."""
-        counts = defaultdict(lambda: defaultdict(list))
-        for example in self.train_set.examples:  # for each example in the training set
-            for i, v in enumerate(example.values):  # in each value
-                print("Example: (%s), i: (%s), v: (%s)" % (str(example), i, v))
-                counts[self.attributes[i].name][v].append(example)
+        self.total_examples = self.trainset.examples.size if trainset else 0
+
+    def count_values(self, chunks=None):
+        """Count each attribute value per class label in a single pass.
+
+        Args:
+            chunks (iterable): blocks of rows, e.g. from MffReader.chunks(),
+                so counting a large file needs only one chunk in memory.
+                Defaults to the examples of the training set.
+
+        Returns:
+            counts[attributeindex][value][classlabel] -> count
+        """
+        if chunks is None:
+            chunks = [self.trainset.examples]
+        counts = defaultdict(lambda: defaultdict(lambda: defaultdict(int)))
+        total = 0
+        for chunk in chunks:
+            for example in chunk:
+                values = list(example)
+                classlabel = values[-1]
+                for i, v in enumerate(values):
+                    counts[i][v][classlabel] += 1
+                total += 1
+        self.total_examples = total
         self.counts = counts
         return counts
 
+    def get_state(self):
+        """Return the value counts as [attributeindex, value, classlabel, count] rows."""
+        if not hasattr(self, 'counts'):
+            raise LogicError("NaiveBayes must be trained before it is saved.")
+        counts = [[i, v, classlabel, count]
+                  for i, values in sorted(self.counts.iteritems())
+                  for v, classes in sorted(values.iteritems())
+                  for classlabel, count in sorted(classes.iteritems())]
+        return {'total_examples': self.total_examples, 'counts': counts}, []
+
+    def set_state(self, params, arrays):
+        """Restore the value counts of get_state."""
+        self.total_examples = params['total_examples']
+        self.counts = defaultdict(lambda: defaultdict(lambda: defaultdict(int)))
+        for i, v, classlabel, count in params['counts']:
+            self.counts[i][v][classlabel] = count
+
     def predict(self, example, target_attribute):
         """Predict an example based on, predict target attribute."""
         self.counts[target_attribute]
 
-    def train(self):
-        """Train datasets."""
-        classes = self.count_values()
-        info = self.predict(classes)
+    def _classify(self, example):
+        """Return the class label with the highest posterior for `example`.
+
+        Value likelihoods are Laplace smoothed, so a value unseen with a
+        class label does not rule that label out.
+        """
+        values = list(example)
+        target = len(values) - 1
+        best, best_score = None, None
+        for classlabel, classes in sorted(self.counts[target].iteritems()):
+            prior = classes[classlabel]
+            score = math.log(prior / float(self.total_examples))
+            for i, v in enumerate(values[:target]):
+                seen = self.counts[i].get(v)
+                count = seen.get(classlabel, 0) if seen else 0
+                score += math.log((count + 1.0) / (prior + len(self.counts[i]) + 1))
+            if best_score is None or score > best_score:
+                best, best_score = classlabel, score
+        return best
+
+    def _train(self):
+        """Count the attribute values of the training set per class label."""
+        self.count_values()
@@ -0,0 +1,100 @@
+"""Cost of choosing one ID3 split.
+
+Compares the info_gain this module replaced (old_info_gain below, a copy
+of the original DataSet code: it recounts frequencies over every example
+for each value) with scanning the examples once per attribute (the
+current info_gain for each attribute) and with counting every attribute x
+class table in one pass (get_best_split_attribute). The old gains did not
+depend on the split, so only its time is comparable.
+
+Usage: python benchmarks/bench_id3.py [file.mff ...]
+"""
+import os
+import sys
+import time
+from collections import defaultdict
+from math import log
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from traintestsets import TrainTestSets  # noqa
+
+
+def timed(function, repeat=5):
+    """Return the best time of `repeat` calls of `function` and its result."""
+    best = None
+    for _ in xrange(repeat):
+        start = time.time()
+        result = function()
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def old_frequency(dataset, attributeindex):
+    """Original DataSet.attribute_frequency."""
+    frequency = defaultdict(lambda: 0.0)
+    for example in dataset.examples:
+        frequency[example[attributeindex]] += 1.0
+    return frequency
+
+
+def old_entropy(dataset, attributeindex, examples):
+    """Original DataSet.entropy, counts over all examples of `dataset`."""
+    frequency = old_frequency(dataset, attributeindex)
+    entropy = 0.0
+    for val in frequency.values():
+        entropy += (-val / examples.__len__()) * log(val / examples.__len__(), 2)
+    return entropy
+
+
+def old_info_gain(dataset, attributeindex):
+    """Original DataSet.info_gain."""
+    examples = dataset.examples
+    gain = 0.0
+    frequency = old_frequency(dataset, attributeindex)
+    n = sum(frequency.values())
+    for value, count in frequency.iteritems():
+        probability = count / n
+        homogenous_on_attr = [e for e in examples if e[attributeindex] == value]
+        current_entropy = old_entropy(dataset, dataset.attributes.classindex, homogenous_on_attr)
+        gain += probability * current_entropy
+    return old_entropy(dataset, attributeindex, examples) - gain
+
+
+def old_code(dataset):
+    """Pick the best split as the original get_best_split_attribute did."""
+    best_gain = 0.0
+    best_attributeindex = None
+    for attributeindex in xrange(dataset.attributes_size - 1):
+        current_gain = old_info_gain(dataset, attributeindex)
+        if best_gain < current_gain:
+            best_gain = current_gain
+            best_attributeindex = attributeindex
+    return best_attributeindex
+
+
+def per_attribute(dataset):
+    """Pick the best split with one scan per attribute."""
+    gains = [(dataset.info_gain(i), -i) for i in xrange(dataset.attributes_size - 1)]
+    return -max(gains)[1]
+
+
+def bench(path):
+    """Print per node split cost of the three strategies."""
+    dataset = TrainTestSets(train_path=path).train
+    old, _ = timed(lambda: old_code(dataset))
+    scans, a = timed(lambda: per_attribute(dataset))
+    tables, b = timed(dataset.get_best_split_attribute)
+    print("%-14s %5s rows %3s attributes  old %.4fs  per-attribute %.4fs  one pass %.4fs  "
+          "(%.1fx old) %s" % (
+              os.path.basename(path), dataset.examples_size, dataset.attributes_size,
+              old, scans, tables, old / tables, 'same split' if a == b else 'DIFFERENT'))
+
+
+if __name__ == '__main__':
+    default = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tests', 'test_data')
+    paths = sys.argv[1:] or [os.path.join(default, p) for p in
+                             ('votes.mff', 'soybean.mff', 'mushroom.mff')]
+    for path in paths:
+        bench(path)
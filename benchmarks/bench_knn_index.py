@@ -0,0 +1,68 @@
+"""Cost of a kNN query with and without a spatial index.
+
+Times NearestNeighbor.find_neighbor comparing each query with every
+training example against the k-d tree (random numeric rows) and the
+VP-tree (soybean, nominal attributes), and checks they find the same
+neighbors.
+
+Usage: python benchmarks/bench_knn_index.py [rows] [queries]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from attributes import Attributes  # noqa
+from dataset import DataSet  # noqa
+from example import MatrixExamples  # noqa
+from kNN import NearestNeighbor  # noqa
+from traintestsets import TrainTestSets  # noqa
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                    'tests', 'test_data')
+
+
+def numeric_dataset(rows, width=4, seed=0):
+    """Return a DataSet of `rows` random numeric rows with a two valued class."""
+    text = "\n".join(["@attribute x%s numeric" % i for i in xrange(width)] +
+                     ["@attribute class a b"])
+    attributes = Attributes.from_string(text)
+    rnd = random.Random(seed)
+    examples = MatrixExamples(attributes)
+    for _ in xrange(rows):
+        values = [rnd.gauss(0.0, 1.0) for _ in xrange(width)]
+        examples.append(values + [int(values[0] > 0)])
+    dataset = DataSet(attributes=attributes, name='random-%s' % rows)
+    dataset.examples = examples
+    return dataset
+
+
+def bench(dataset, queries, index='auto'):
+    """Print per query time of brute force and the index on `dataset`."""
+    examples = list(dataset.examples)
+    queries = [examples[i] for i in random.Random(1).sample(xrange(len(examples)),
+                                                               min(queries, len(examples)))]
+    brute = NearestNeighbor(dataset, k=5)
+    indexed = NearestNeighbor(dataset, k=5, index=index)
+    start = time.time()
+    indexed.train()
+    build = time.time() - start
+    start = time.time()
+    expected = [brute.find_neighbor(e) for e in queries]
+    scan = (time.time() - start) / len(queries)
+    start = time.time()
+    found = [indexed.find_neighbor(e) for e in queries]
+    query = (time.time() - start) / len(queries)
+    print("%-14s %6s rows  %-6s build %.3fs  brute force %.5fs/query  index %.5fs/query "
+          "(%.1fx) %s" % (dataset.name, dataset.examples_size, type(indexed._index).__name__,
+                          build, scan, query, scan / query,
+                          'same' if found == expected else 'DIFFERENT'))
+
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    bench(numeric_dataset(rows), queries)
+    bench(TrainTestSets(train_path=os.path.join(DATA, 'soybean.mff')).train, queries)
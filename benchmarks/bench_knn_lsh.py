@@ -0,0 +1,80 @@
+"""Approximate kNN: query latency and agreement with exact kNN.
+
+Every other example of each data set trains NearestNeighbor, the rest are
+classified exactly (brute force) and with the LSH index at several table
+counts. Reports time per query, the share of exact neighbors found
+(recall) and the share of identical predictions (agreement). Besides the
+bundled test data a larger random numeric set shows the latency on big
+training sets.
+
+Usage: python benchmarks/bench_knn_lsh.py [rows] [file.mff ...]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from attributes import Attributes  # noqa
+from dataset import DataSet  # noqa
+from kNN import NearestNeighbor  # noqa
+from traintestsets import TrainTestSets  # noqa
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                    'tests', 'test_data')
+TABLES = (2, 5, 10, 20)
+
+
+def timed(classifier, test):
+    """Return the seconds per query and the neighbors and labels of `test`."""
+    classes = classifier.train_examples.get_class_value_at
+    start = time.time()
+    neighbors = classifier.kneighbors(test)
+    labels = [classifier.find_response([classes(i) for _, i in n]) for n in neighbors]
+    return (time.time() - start) / len(test), neighbors, labels
+
+
+def clustered_dataset(rows, width=6, clusters=20, seed=0):
+    """Return a DataSet of `rows` numeric rows around random centers, the class is the center."""
+    text = "\n".join(["@attribute x%s numeric" % i for i in xrange(width)] +
+                     ["@attribute class %s" % " ".join(str(c) for c in xrange(clusters))])
+    attributes = Attributes.from_string(text)
+    rnd = random.Random(seed)
+    centers = [[rnd.uniform(-5.0, 5.0) for _ in xrange(width)] for _ in xrange(clusters)]
+    dataset = DataSet(attributes=attributes, name='clustered')
+    for _ in xrange(rows):
+        c = rnd.randrange(clusters)
+        example = dataset.examples.make_example([rnd.gauss(x, 1.0) for x in centers[c]] + [c])
+        dataset.examples.append(example)
+    return dataset
+
+
+def bench(dataset, k=5, queries=500):
+    """Print exact and approximate kNN on the examples of `dataset`."""
+    examples = list(dataset.examples)
+    train = DataSet(dataset.attributes, examples[::2], name=dataset.name)
+    test = DataSet(dataset.attributes, examples[1::2][:queries], name=dataset.name)
+    exact = NearestNeighbor(train, k=k)
+    exact.train()
+    seconds, expected, labels = timed(exact, test.examples)
+    print("%-14s %5s train %5s test  exact %.5fs/query" % (
+        dataset.name, train.examples_size, test.examples_size, seconds))
+    for tables in TABLES:
+        approximate = NearestNeighbor(train, k=k, index='lsh', tables=tables)
+        approximate.train()
+        seconds, found, predicted = timed(approximate, test.examples)
+        recall = sum(len(set(a) & set(b)) for a, b in zip(found, expected))
+        recall /= float(sum(len(b) for b in expected))
+        agreement = sum(1 for a, b in zip(predicted, labels) if a == b) / float(len(labels))
+        print("%35s lsh tables=%-3s %.5fs/query  recall %.3f  agreement %.3f" % (
+            '', tables, seconds, recall, agreement))
+
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    for path in sys.argv[2:] or [os.path.join(DATA, name) for name in
+                                 ('votes.mff', 'soybean.mff', 'mushroom.mff',
+                                  'iris-binary.mff')]:
+        bench(TrainTestSets(train_path=path).train)
+    bench(clustered_dataset(rows))
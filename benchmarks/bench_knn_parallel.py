@@ -0,0 +1,45 @@
+"""Parallel kNN scoring: classify_batch throughput by number of processes.
+
+A random numeric set trains NearestNeighbor (k-d tree, then brute force
+on a tenth of the queries) and a second one is classified with
+classify_batch at each n_jobs. Reports queries per second, the speedup
+over one process and whether the labels match. Speedup is bounded by
+the number of cores of the machine.
+
+Usage: python benchmarks/bench_knn_parallel.py [rows] [queries] [n_jobs ...]
+"""
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_knn_lsh import clustered_dataset  # noqa
+from kNN import NearestNeighbor  # noqa
+
+
+def bench(train, test, jobs, index=None, k=5):
+    """Print the classify_batch throughput of `test` at each n_jobs in `jobs`."""
+    classifier = NearestNeighbor(train, k=k, index=index)
+    classifier.train()
+    expected, baseline = None, None
+    for n_jobs in jobs:
+        start = time.time()
+        labels = classifier.classify_batch(test, n_jobs=n_jobs)
+        seconds = time.time() - start
+        if expected is None:
+            expected, baseline = labels, seconds
+        print("%-8s n_jobs=%-3s %8.0f queries/s  speedup %.2f  same labels %s" % (
+            index or 'brute', n_jobs, test.examples_size / seconds, baseline / seconds,
+            labels == expected))
+
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    jobs = [int(n) for n in sys.argv[3:]] or sorted(set([1, 2, multiprocessing.cpu_count()]))
+    print("%s cpus, %s training rows, %s queries" % (multiprocessing.cpu_count(), rows, queries))
+    train, test = clustered_dataset(rows), clustered_dataset(queries, seed=1)
+    bench(train, test, jobs, index='kdtree')
+    bench(train, clustered_dataset(queries // 10, seed=1), jobs)
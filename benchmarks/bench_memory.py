@@ -0,0 +1,60 @@
+"""Per-row memory of Example, CompactExample and MatrixExamples storage.
+
+CompactExample rows of all-nominal data (soybean) hold signed bytes.
+
+Usage: python benchmarks/bench_memory.py [file.mff ...]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from example import MatrixExamples  # noqa
+from reader import MffReader  # noqa
+
+
+def deep_size(obj, seen):
+    """Bytes used by `obj` and everything it references, counted once."""
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (list, tuple)):
+        size += sum(deep_size(v, seen) for v in obj)
+    elif isinstance(obj, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.iteritems())
+    if hasattr(obj, '__dict__'):
+        size += deep_size(obj.__dict__, seen)
+    for slot in getattr(type(obj), '__slots__', ()):
+        if hasattr(obj, slot):
+            size += deep_size(getattr(obj, slot), seen)
+    return size
+
+
+def bench(path):
+    """Print bytes per row and build time for each storage."""
+    reader = MffReader(path)
+    print("%s" % path)
+    baseline = None
+    for name, kwargs in [('Example', {}), ('CompactExample', {'compact': True}),
+                         ('MatrixExamples', {'matrix': True})]:
+        start = time.time()
+        examples = reader.read(**kwargs).examples
+        elapsed = time.time() - start
+        seen = set()
+        if isinstance(examples, MatrixExamples):
+            size = deep_size(examples.matrix, seen) + deep_size(examples.classes, seen)
+        else:
+            size = sum(deep_size(e, seen) for e in examples)
+        per_row = size / float(examples.size)
+        baseline = baseline or per_row
+        print("  %-15s %8.1f bytes/row %4.0f%% of Example  %6.3fs to load %s rows" % (
+            name, per_row, 100 * per_row / baseline, elapsed, examples.size))
+
+
+if __name__ == '__main__':
+    default = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tests', 'test_data')
+    paths = sys.argv[1:] or [os.path.join(default, p) for p in ('soybean.mff', 'bikes.mff')]
+    for path in paths:
+        bench(path)
@@ -0,0 +1,63 @@
+"""Decision tree inference cost.
+
+Compares classifying every training example by walking the Node tree
+recursively (recursive below, the original DecisionTree._classify) with
+the CompiledTree's generated function, both row by row and straight from
+a MatrixExamples matrix.
+
+Usage: python benchmarks/bench_tree.py [file.mff ...]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DT import DecisionTree  # noqa
+from traintestsets import TrainTestSets  # noqa
+
+
+def timed(function, repeat=3):
+    """Return the best time of `repeat` calls of `function` and its result."""
+    best = None
+    for _ in xrange(repeat):
+        start = time.time()
+        result = function()
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def recursive(example, node):
+    """Original DecisionTree._classify."""
+    if node.is_leaf:
+        return node.classlabel
+    if node.attribute is None:
+        return node.classlabel
+    child_node = node[node.branch(example[node.attribute])]
+    return recursive(example, child_node)
+
+
+def bench(path):
+    """Print inference time of the recursive and compiled trees."""
+    dataset = TrainTestSets(train_path=path).train
+    matrix = TrainTestSets(train_path=path, matrix=True).train
+    tree = DecisionTree(dataset)
+    tree.train()
+    tree.compile()
+    walk, a = timed(lambda: [recursive(e, tree.root) for e in dataset.examples])
+    rows, b = timed(lambda: tree.classify_batch(dataset))
+    flat, c = timed(lambda: tree.classify_batch(matrix))
+    print("%-14s %6s rows %4s nodes  recursive %.4fs  compiled %.4fs (%.1fx)  "
+          "matrix %.4fs (%.1fx) %s" % (
+              dataset.name, dataset.examples_size, tree.compiled.size, walk,
+              rows, walk / rows, flat, walk / flat,
+              'same' if a == b == c else 'DIFFERENT'))
+
+
+if __name__ == '__main__':
+    data = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        'tests', 'test_data')
+    for path in sys.argv[1:] or [os.path.join(data, name) for name in
+                                 ('votes.mff', 'soybean.mff', 'mushroom.mff')]:
+        bench(path)
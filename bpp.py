@@ -14,6 +14,10 @@
 import argparse
 
 import all_exceptions as exceptions
+from bayes import NaiveBayes  # noqa, saved models of every classifier can be loaded
+from classifier import Classifier
+from DT import DecisionTree  # noqa
+from kNN import NearestNeighbor  # noqa
 from neuralnetwork import NeuralNetwork
 from traintestsets import TrainTestSets
 from evaluator import Evaluator
@@ -38,18 +42,31 @@ def parse_args():
                         help='number of hidden nodes for the backprop algorithm')
     parser.add_argument('-d', '--debug', dest='debug', default=False,
                         help='print debug statements: defaults=False')
+    parser.add_argument('-c', '--cache', dest='cache', default=False, action='store_true',
+                        help='load .mff files through a compiled binary cache')
+    parser.add_argument('-w', '--workers', dest='workers', default=1, type=int,
+                        help='number of processes used to parse .mff files')
+    parser.add_argument('-s', '--sparse', dest='sparse', default=False, action='store_true',
+                        help='store one-hot encoded examples as sparse rows')
+    parser.add_argument('-o', '--save-model', dest='save_model', default=None,
+                        help='train on the whole trainfile and save the model to this path')
+    parser.add_argument('-l', '--load-model', dest='load_model', default=None,
+                        help='score the testfile (or trainfile) with a saved model')
     parser.add_argument('-z', '--test', dest="test", default=False,
                         help='For testing purposes IGNORE')
     args = parser.parse_args()
     return args
 
 
-def create_dataset(trainfile, testfile=None):
+def create_dataset(trainfile, testfile=None, cache=False, workers=1, sparse=False):
     """Input file of test set."""
     if testfile is None and trainfile is None:
         raise exceptions.LogicError("No trainfile supplied")
-    traintestsets = TrainTestSets(test_path=testfile, train_path=trainfile)
-    traintestsets.train.normalize_attributes()
+    traintestsets = TrainTestSets(test_path=testfile, train_path=trainfile, use_cache=cache,
+                                  workers=workers)
+    preprocessor = traintestsets.train.normalize_attributes(sparse=sparse)
+    if traintestsets.test_set:
+        traintestsets.test_set.normalize_attributes(preprocessor)
     return traintestsets
 
 
@@ -73,6 +90,19 @@ def evaluate(classifier, testset=None, holdout=None, folds=10):
     return evaluator
 
 
+def score(model_path, path, cache=False, workers=1):
+    """Classify the raw .mff file `path` with the model saved in `model_path`."""
+    classifier = Classifier.load(model_path)
+    dataset = TrainTestSets(train_path=path, use_cache=cache, workers=workers).train
+    if classifier.trainset.preprocessor is not None:
+        dataset.normalize_attributes(classifier.trainset.preprocessor)
+    correct = sum(1 for e in dataset.examples if classifier.classify(example=e) == e[-1])
+    accuracy = correct / float(dataset.examples_size)
+    print("%s" % classifier.model)
+    print("Accuracy: %s" % accuracy)
+    return accuracy
+
+
 def _test():
     dset = create_dataset('tests/lenses.mff')
     dset.train.normalize_attributes()
@@ -107,12 +137,18 @@ def main():
     args = parse_args()
     if args.test:
         _test()
+    elif args.load_model:
+        score(args.load_model, args.testfile or args.trainfile, args.cache, args.workers)
     else:
-        dataset = create_dataset(args.trainfile, args.testfile)
+        dataset = create_dataset(args.trainfile, args.testfile, args.cache, args.workers,
+                                 args.sparse)
         max_error = 1.0 - args.min_error
         # self, trainset, n=0.01, j=5, max_error=.3, debug=False
         classifier = NeuralNetwork(dataset.train, args.n, args.j, max_error, debug=args.debug)
         evaluate(classifier, dataset.test_set, args.holdout, args.folds)
+        if args.save_model:
+            classifier.train(dataset.train)
+            classifier.save(args.save_model)
 
 
 if __name__ == '__main__':
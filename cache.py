@@ -0,0 +1,345 @@
+"""
+cache.py.
+
+Compiled binary form of parsed .mff files.
+
+A compiled file holds a fixed header, the `@dataset`/`@attribute` lines of
+the source and the packed arrays of a MatrixExamples store:
+
+    header   magic, version, source size/mtime/sha1, rows, width,
+             class typecode, schema length (see _HEADER)
+    schema   text of the source header, padded to 8 bytes
+    matrix   rows * width little-endian doubles
+    classes  rows class values, typecode/itemsize given in the header
+
+Arrays start on 8 byte boundaries so the file can also be memory-mapped.
+"""
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from all_exceptions import LogicError
+from attributes import Attributes
+from dataset import DataSet
+from example import MatrixExamples
+from reader import MffReader
+
+
+logger = logging.getLogger(__name__)
+
+MAGIC = 'BPPC'
+VERSION = 1
+EXTENSION = '.mffc'
+_HEADER = struct.Struct('<4sIQdQQcB6x20s4xQ')
+_FORMATS = {('d', 8): 'd', ('l', 4): 'i', ('l', 8): 'q'}
+_maps = {}
+
+
+def _align(n):
+    """Round `n` up to a multiple of 8."""
+    return (n + 7) & ~7
+
+
+def _digest(path):
+    """Return the sha1 digest of the file at `path`."""
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), ''):
+            sha1.update(block)
+    return sha1.digest()
+
+
+def cache_path(path, cache_dir=None):
+    """Return where the compiled form of `path` lives.
+
+    Next to the source by default, otherwise in `cache_dir` under a name
+    that includes a hash of the source's absolute path.
+    """
+    if cache_dir is None:
+        return path + 'c' if path.endswith('.mff') else path + EXTENSION
+    key = hashlib.md5(os.path.abspath(path)).hexdigest()[:12]
+    return os.path.join(cache_dir, '%s.%s%s' % (os.path.basename(path), key, EXTENSION))
+
+
+class CompiledHeader(object):
+    """Header of a compiled file plus the offsets of its sections."""
+
+    def __init__(self, size, mtime, digest, rows, width, typecode, itemsize, schema):
+        """Store header fields, `schema` is the text of the source header."""
+        self.size = size
+        self.mtime = mtime
+        self.digest = digest
+        self.rows = rows
+        self.width = width
+        self.typecode = typecode
+        self.itemsize = itemsize
+        self.schema = schema
+
+    @property
+    def matrix_offset(self):
+        """Byte offset of the value matrix."""
+        return _align(_HEADER.size + len(self.schema))
+
+    @property
+    def classes_offset(self):
+        """Byte offset of the class column."""
+        return self.matrix_offset + self.rows * self.width * 8
+
+    def pack(self):
+        """Return the header and padded schema as a string."""
+        header = _HEADER.pack(MAGIC, VERSION, self.size, self.mtime, self.rows,
+                              self.width, self.typecode, self.itemsize,
+                              self.digest, len(self.schema))
+        header += self.schema
+        return header + '\0' * (self.matrix_offset - len(header))
+
+    def attributes(self):
+        """Return the name and Attributes described by the schema."""
+        name = None
+        for line in self.schema.split("\n"):
+            if '@dataset' in line:
+                name = line.split(" ")[1]
+        return name, Attributes.from_string(self.schema)
+
+    def is_fresh(self, source, check_hash=False):
+        """Return True if this header was compiled from `source` as it is now."""
+        stat = os.stat(source)
+        if stat.st_size != self.size or stat.st_mtime != self.mtime:
+            return False
+        return not check_hash or _digest(source) == self.digest
+
+    @classmethod
+    def read(cls, f):
+        """Read a header from the open file `f`."""
+        data = f.read(_HEADER.size)
+        if len(data) != _HEADER.size:
+            raise LogicError("Compiled file is truncated.")
+        (magic, version, size, mtime, rows, width, typecode,
+         itemsize, digest, schema_len) = _HEADER.unpack(data)
+        if magic != MAGIC or version != VERSION:
+            raise LogicError("Not a version %s compiled .mff file." % VERSION)
+        if array(typecode).itemsize != itemsize:
+            raise LogicError("Class column was compiled with a different item size.")
+        schema = f.read(schema_len)
+        return cls(size, mtime, digest, rows, width, typecode, itemsize, schema)
+
+
+def _to_file(values, f):
+    """Write `values` to `f` in little-endian order."""
+    if isinstance(values, MappedArray):
+        values.tofile(f)
+        return
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    values.tofile(f)
+
+
+def _from_file(typecode, n, f):
+    """Read `n` little-endian values of `typecode` from `f`."""
+    values = array(typecode)
+    values.fromfile(f, n)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+def _map(target):
+    """Return a read-only map of `target`, shared by every array in the process.
+
+    When `target` was replaced (e.g. recompiled) since it was mapped, a
+    new map replaces the old one here. Arrays opened earlier keep their
+    own reference to the old map, which is freed with the last of them.
+    """
+    target = os.path.abspath(target)
+    stat = os.stat(target)
+    version = (stat.st_ino, stat.st_size, stat.st_mtime)
+    if target in _maps:
+        mapped_version, mapped = _maps[target]
+        if mapped_version == version:
+            return mapped
+    with open(target, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    _maps[target] = (version, mapped)
+    return mapped
+
+
+def _mapped_array(target, offset, length, typecode, itemsize):
+    """Unpickle a MappedArray by mapping its file again."""
+    return MappedArray(target, offset, length, typecode, itemsize)
+
+
+class MappedArray(object):
+    """Read-only array of values inside a memory-mapped compiled file.
+
+    Values are unpacked from the map when they are read: nothing is copied
+    up front and every process mapping the same file shares the page
+    cache, but each read (a row, a slice) copies its values out of the
+    map. Pickling only sends the file name and offsets.
+
+    Attributes
+    ----------
+        target (str): path of the compiled file
+        typecode (str): array typecode of the values
+        itemsize (int): size of a value in bytes
+    """
+
+    def __init__(self, target, offset, length, typecode, itemsize):
+        """Map `length` values of `typecode` starting at byte `offset`."""
+        self.target = target
+        self.typecode = typecode
+        self.itemsize = itemsize
+        self._offset = offset
+        self._length = length
+        self._map = _map(target)
+        self._format = _FORMATS[(typecode, itemsize)]
+        self._item = struct.Struct('<' + self._format)
+
+    def __reduce__(self):
+        """Pickle as a reference to the file rather than the values."""
+        return (_mapped_array, (self.target, self._offset, self._length,
+                                self.typecode, self.itemsize))
+
+    def __len__(self):
+        """Return number of values."""
+        return self._length
+
+    def __iter__(self):
+        """Make iterable."""
+        return iter(self[:])
+
+    def __getitem__(self, val):
+        """Allow for indexing and slicing, slices come back as arrays."""
+        if isinstance(val, slice):
+            start, stop, step = val.indices(self._length)
+            if step == 1:
+                n = max(0, stop - start)
+                values = struct.unpack_from('<%s%s' % (n, self._format), self._map,
+                                            self._offset + start * self.itemsize)
+            else:
+                unpack = self._item.unpack_from
+                values = [unpack(self._map, self._offset + i * self.itemsize)[0]
+                          for i in xrange(start, stop, step)]
+            return array(self.typecode, values)
+        if val < 0:
+            val += self._length
+        if not 0 <= val < self._length:
+            raise IndexError("MappedArray index out of range")
+        return self._item.unpack_from(self._map, self._offset + val * self.itemsize)[0]
+
+    def __setitem__(self, i, val):
+        """Mapped arrays are read-only."""
+        raise LogicError("Memory-mapped examples are read-only.")
+
+    def append(self, val):
+        """Mapped arrays are read-only."""
+        raise LogicError("Memory-mapped examples are read-only.")
+
+    def extend(self, values):
+        """Mapped arrays are read-only."""
+        raise LogicError("Memory-mapped examples are read-only.")
+
+    def tolist(self):
+        """Return the values as a list."""
+        return self[:].tolist()
+
+    def tofile(self, f):
+        """Write the raw little-endian values to `f`."""
+        f.write(self._map[self._offset:self._offset + self._length * self.itemsize])
+
+
+def write(dataset, target, source):
+    """Write `dataset`, parsed from `source`, to the compiled file `target`."""
+    examples = dataset.examples
+    if not isinstance(examples, MatrixExamples):
+        matrix = MatrixExamples(dataset.attributes)
+        for example in examples:
+            matrix.append(example)
+        examples = matrix
+    schema = "\n".join(MffReader(source).header)
+    stat = os.stat(source)
+    header = CompiledHeader(stat.st_size, stat.st_mtime, _digest(source), examples.size,
+                            examples.width, examples.classes.typecode,
+                            examples.classes.itemsize, schema)
+    tmp = '%s.%s.tmp' % (target, os.getpid())
+    with open(tmp, 'wb') as f:
+        f.write(header.pack())
+        _to_file(examples.matrix, f)
+        _to_file(examples.classes, f)
+    os.rename(tmp, target)
+
+
+def read(target, matrix=True, compact=False):
+    """Read the DataSet stored in the compiled file `target`."""
+    with open(target, 'rb') as f:
+        header = CompiledHeader.read(f)
+        name, attributes = header.attributes()
+        f.seek(header.matrix_offset)
+        examples = MatrixExamples.from_arrays(
+            attributes, _from_file('d', header.rows * header.width, f),
+            _from_file(header.typecode, header.rows, f))
+    if not matrix:
+        examples = examples.to_examples(compact)
+    dataset = DataSet(name=name, attributes=attributes)
+    dataset.examples = examples
+    return dataset
+
+
+def open_mapped(target):
+    """Open the DataSet in the compiled file `target` as a read-only map.
+
+    No rows are loaded up front; ExampleView objects of the returned
+    examples unpack their row's values from the map when they are read.
+    """
+    with open(target, 'rb') as f:
+        header = CompiledHeader.read(f)
+    name, attributes = header.attributes()
+    target = os.path.abspath(target)
+    matrix = MappedArray(target, header.matrix_offset, header.rows * header.width, 'd', 8)
+    classes = MappedArray(target, header.classes_offset, header.rows,
+                          header.typecode, header.itemsize)
+    dataset = DataSet(name=name, attributes=attributes)
+    dataset.examples = MatrixExamples.from_arrays(attributes, matrix, classes)
+    return dataset
+
+
+def load(source, cache_dir=None, matrix=True, check_hash=False, mapped=False, workers=1,
+         compact=False):
+    """Return the DataSet in `source`, going through its compiled form.
+
+    The compiled file is used when it matches the size and mtime (and the
+    sha1 if `check_hash`) of `source`. Otherwise `source` is parsed and
+    compiled for next time. With `mapped` the examples are opened as a
+    read-only memory map of the compiled file (see open_mapped). `workers`
+    processes are used when `source` has to be parsed. `compact` picks
+    CompactExample rows when `matrix` is off.
+    """
+    target = cache_path(source, cache_dir)
+    if os.path.exists(target):
+        try:
+            with open(target, 'rb') as f:
+                fresh = CompiledHeader.read(f).is_fresh(source, check_hash)
+            if fresh and mapped:
+                return open_mapped(target)
+            if fresh:
+                return read(target, matrix=matrix, compact=compact)
+        except (LogicError, IOError, EOFError, struct.error) as e:
+            logger.warning("Ignoring compiled file %s: %s", target, e)
+    dataset = MffReader(source).read(matrix=True, workers=workers)
+    try:
+        if cache_dir is not None and not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        write(dataset, target, source)
+    except (IOError, OSError) as e:
+        if mapped:
+            raise LogicError("Could not write compiled file %s: %s" % (target, e))
+        logger.warning("Could not write compiled file %s: %s", target, e)
+    if mapped:
+        return open_mapped(target)
+    if not matrix:
+        dataset.examples = dataset.examples.to_examples(compact)
+    return dataset
@@ -14,6 +14,8 @@ logger = logging.getLogger(__name__)
 class Classifier(object):
     """Base class for classifiers."""
 
+    _testset = None
+
     def __init__(self, trainset=None):
         """Training set for a classifier."""
         self.trainset = trainset
@@ -63,6 +65,36 @@ class Classifier(object):
         """Implemented in classifier objects."""
         pass
 
+    def save(self, path):
+        """Write the trained classifier, its schema and preprocessor to `path`."""
+        import model  # model imports dataset, which imports this module
+        model.save(self, path)
+
+    @classmethod
+    def load(cls, path):
+        """Read a classifier written by save, ready to classify."""
+        import model
+        classifier = model.load(path)
+        if not isinstance(classifier, cls):
+            raise LogicError("%s holds a %s, not a %s." % (path, type(classifier).__name__,
+                                                          cls.__name__))
+        return classifier
+
+    def get_state(self):
+        """Return the (params, arrays) that save writes.
+
+        `params` is a JSON serializable dict and `arrays` a list of
+        (name, array) pairs of the trained state.
+        """
+        raise LogicError("%s cannot be saved." % type(self).__name__)
+
+    def set_state(self, params, arrays):
+        """Restore a get_state result, `arrays` maps name -> array.
+
+        The trainset is an empty DataSet with the saved schema.
+        """
+        raise LogicError("%s cannot be loaded." % type(self).__name__)
+
     def classify(self, example=None, dataset=None):
         """Classify a dataset or an example."""
         if example:  # classify an entire dataset
@@ -3,12 +3,38 @@ dataset.py.
 
 Holds the DataSet class.
 """
-from example import Examples
+from cStringIO import StringIO
+
+from encoder import BinaryEncoder
+from example import Examples, MatrixExamples
+from preprocessor import Preprocessor
 from math import log
 from operator import itemgetter
 from collections import defaultdict
-from attribute import NominalAttribute, NumericAttribute
-from attributes import Attributes
+from attribute import NominalAttribute
+
+
+def entropy(counts):
+    """Entropy in bits of a distribution given as counts."""
+    n = float(sum(counts))
+    return -sum(c / n * log(c / n, 2) for c in counts if c)
+
+
+def table_gain(table, class_counts, n):
+    """Information gain of an attribute from its contingency table.
+
+    Args:
+        table (dict): (value, classlabel) -> count
+        class_counts (dict): classlabel -> count
+        n (float): number of examples
+    """
+    by_value = defaultdict(list)
+    for (value, classlabel), count in table.iteritems():
+        by_value[value].append(count)
+    remainder = 0.0
+    for counts in by_value.itervalues():
+        remainder += sum(counts) / n * entropy(counts)
+    return entropy(class_counts.values()) - remainder
 
 
 class DataSet(object):
@@ -19,15 +45,34 @@ class DataSet(object):
         self._attributes = attributes
         self._examples = Examples(self._attributes)
         self._name = name
+        self.preprocessor = None
         self.add(examples=examples)
 
     def __str__(self):
         """Return string representation of dataset as would look in file."""
-        string = "@dataset %s\n\n" % self._name
-        string = string + str(self.attributes) + "\n"
-        string = string + "@examples\n\n"
-        string = string + str(self.examples)
-        return string
+        out = StringIO()
+        self.write(out)
+        return out.getvalue()
+
+    def write(self, path_or_file):
+        """Write the dataset in .mff format to a path or an open file.
+
+        Rows are streamed to the file one at a time, so memory use does not
+        grow with the number of examples.
+        """
+        if isinstance(path_or_file, basestring):
+            with open(path_or_file, 'w') as f:
+                return self.write(f)
+        f = path_or_file
+        f.write("@dataset %s\n\n" % self._name)
+        f.write(str(self.attributes))
+        f.write("\n@examples\n\n")
+        self.examples.write(f)
+
+    @property
+    def name(self):
+        """Return name of the dataset."""
+        return self._name
 
     @property
     def attributes(self):
@@ -89,69 +134,49 @@ class DataSet(object):
 
     def nominal_to_linear(self):
         """Return dataset with linear encoded attributes."""
+        stats = self.examples.statistics()
         for i, attribute in enumerate(self.attributes):
             # Use linear encoding for bpp
             if isinstance(attribute, NominalAttribute) and len(attribute.domain) <= 2:
                 continue
-            mean = self.examples.mean(i)
-            stdev = self.examples.stdev(i)
+            mean = stats.mean(i)
+            stdev = stats.stdev(i)
+            if i == self.attributes.classindex and isinstance(self.examples, MatrixExamples):
+                # the class array holds nominal indices as ints, replace it whole
+                self.examples.classes = [(v - mean) / stdev for v in self.examples.classes]
+                continue
             for k, e in enumerate(self.examples):
-                self.examples[k].values[i] = (e.values[i] - mean) / stdev
+                self.examples[k][i] = (e[i] - mean) / stdev
 
-    def normalize_attributes(self):
-        """Convert all attributes to binary or standardize numeric."""
-        self._convert_numeric_attributes()
-        self._convert_attributes_to_binary()
-        self.examples.attributes = self.binary_attributes
-        self._attributes = self.binary_attributes
-        # print(self.binary_attributes)
+    def normalize_attributes(self, preprocessor=None, sparse=False):
+        """Standardize numeric attributes and convert nominal ones to binary.
 
-    def _convert_numeric_attributes(self):
-        for i, attribute in enumerate(self.attributes):
-            if isinstance(attribute, NumericAttribute):
-                mean = self.examples.mean(i)
-                stdev = self.examples.stdev(i)
-                for k, e in enumerate(self.examples):
-                    self.examples[k].values[i] = float(e.values[i] - mean) / stdev
-
-    def _convert_attributes_to_binary(self):
-        # convert attributes with domain > 2
-        self.binary_attributes = Attributes()
-        self.new_examples = self.examples
-        for i, attribute in enumerate(self.attributes):
-            if isinstance(attribute, NominalAttribute) and len(attribute.domain) > 2:
-                self._convert_attribute_to_binary(attribute, i)
-            else:
-                self.binary_attributes.add(attribute)
-
-    def _convert_attribute_to_binary(self, attribute, attributeindex):
-        """Convert one attribute to binary."""
-        # conversion_dict = {}
-        if len(attribute.domain) < 2:
-            self.binary_attributes.add(attribute)
-        else:
-            for i, v in enumerate(attribute.domain):
-                a = NominalAttribute(name=attribute.name + str(i))
-                a.domain = [0.0, 1.0]
-                a.place = i
-                a.value = v
-                self.binary_attributes.add(a)
-                for example in self.examples:
-                    if v != attribute.domain[i]:
-                        example.values.insert((attributeindex + 1 + i), 0.0)
-                    else:
-                        example.values.insert((attributeindex + 1 + i), 1.0)
-            for i, example in enumerate(self.examples):
-                del example.values[attributeindex]
-                self.examples._examples[i] = example
-        for i, e in enumerate(self.examples):
-            self.examples[i].values[attributeindex]
-
-    # def _convert_examples_to_binary(self):
-    #     """Convert examples to binary."""
-    #     self.binary_examples = Examples(self.binary_attributes)
-    #     for e in self.examples.to_binary(self.binary_attributes):
-    #         self.binary_examples.add(e)
+        Fits a Preprocessor on this dataset unless one is given, e.g. the one
+        fitted on the matching training set. It is kept in
+        self.preprocessor, and normalizing again does nothing. With `sparse`
+        the examples are stored as SparseExamples.
+        """
+        if self.preprocessor is not None:
+            return self.preprocessor
+        if preprocessor is None:
+            preprocessor = Preprocessor(sparse=sparse).fit(self)
+        normalized = preprocessor.transform(self)
+        self._attributes = normalized.attributes
+        self._examples = normalized.examples
+        self.preprocessor = preprocessor
+        return preprocessor
+
+    def to_binary(self):
+        """Return a new dataset with nominal attributes one-hot encoded.
+
+        Nominal attributes with more than two values become one binary
+        attribute per value, the class attribute is kept as is. This
+        dataset is left untouched.
+        """
+        encoder = BinaryEncoder(self.attributes)
+        dataset = DataSet(attributes=encoder.attributes, name=self._name)
+        dataset.examples = encoder.encode(self.examples)
+        return dataset
 
     ################### noqa
     #   ID3 Methods   # noqa
@@ -162,59 +187,73 @@ class DataSet(object):
         classlabel_freq = self.attribute_frequency(self.attributes.classindex)
         return len(classlabel_freq.keys()) == 1
 
-    def get_best_split_attribute(self):
-        """Return best split attribute."""
+    def get_best_split_attribute(self, tables=None):
+        """Return best split attribute.
+
+        The gain of every attribute comes from the contingency tables,
+        which are counted in a single pass over the examples.
+        """
+        if tables is None:
+            tables = self.contingency_tables()
+        class_counts, attribute_tables = tables
+        n = float(sum(class_counts.itervalues()))
         best_gain = 0.0
         best_attributeindex = None
-        for attributeindex in xrange(self.attributes.size):
-            if attributeindex == self.attributes.classindex:
-                continue
-            current_gain = self.info_gain(attributeindex)
+        for attributeindex in sorted(attribute_tables):
+            current_gain = table_gain(attribute_tables[attributeindex], class_counts, n)
             if best_gain < current_gain:
                 best_gain = current_gain
                 best_attributeindex = attributeindex
         return best_attributeindex
 
-    def split_on_attribute(self, attributeindex):
-        """Split on best attribute."""
-        splits = []
-        for val in xrange(len(self.attributes[attributeindex].domain)):
-            examples = [e for e in self.examples if e[attributeindex] == val]
-            dataset = DataSet(examples=examples, attributes=self.attributes)
-            splits.append((dataset, val))
-        return splits
+    def contingency_tables(self, examples=None, attributeindexes=None):
+        """Count class labels, and attribute value x class label pairs, in one pass.
+
+        Args:
+            examples: Examples or list of examples, defaults to self.examples
+            attributeindexes (list): attributes to count, defaults to every
+                non-class attribute
+
+        Returns:
+            (class_counts, tables) where class_counts[classlabel] is a count
+            and tables[attributeindex][(value, classlabel)] is a count.
+        """
+        if examples is None:
+            examples = self.examples
+        classindex = self.attributes.classindex
+        if attributeindexes is None:
+            attributeindexes = [i for i in xrange(self.attributes.size) if i != classindex]
+        rows = examples.rows() if isinstance(examples, Examples) else (e.values for e in examples)
+        class_counts = defaultdict(int)
+        tables = dict((i, defaultdict(int)) for i in attributeindexes)
+        columns = [(i, tables[i]) for i in attributeindexes]
+        for values in rows:
+            classlabel = values[classindex]
+            class_counts[classlabel] += 1
+            for i, table in columns:
+                table[(values[i], classlabel)] += 1
+        return class_counts, tables
 
     def info_gain(self, attributeindex, examples=None):
         """Calculate the gained from an attribute for the class."""
-        if examples is None:  # base case
-            examples = self.examples
-        gain = 0.0
-        frequency = self.attribute_frequency(attributeindex)
-        n = sum(frequency.values())
-        for value, count in frequency.iteritems():
-            probability = count / n
-            # examples where all homogenous values for current value
-            homogenous_on_attr = [e for e in examples if e[attributeindex] == value]
-            # calc entropy for examples where the current attribute values
-            # are similar w/ respect ot the classinde
-            current_entropy = self.entropy(self.attributes.classindex, homogenous_on_attr)
-            gain += probability * current_entropy
-        gain = self.entropy(attributeindex, examples) - gain
-        return gain
-
-    def entropy(self, attributeindex, examples):
+        class_counts, tables = self.contingency_tables(examples, [attributeindex])
+        n = float(sum(class_counts.itervalues()))
+        return table_gain(tables[attributeindex], class_counts, n)
+
+    def entropy(self, attributeindex, examples=None):
         """Entropy of dataset for the attribute param."""
-        frequency = self.attribute_frequency(attributeindex)
-        entropy = 0.0
-        for val in frequency.values():
-            entropy += (-val / examples.__len__()) * log(val / examples.__len__(), 2)
-        return entropy
+        frequency = self.attribute_frequency(attributeindex, examples)
+        return entropy(frequency.values())
 
-    def attribute_frequency(self, attributeindex):
+    def attribute_frequency(self, attributeindex, examples=None):
         """Return frequency of attribute in data."""
+        if examples is None:
+            column = self.examples.column(attributeindex)
+        else:
+            column = [e[attributeindex] for e in examples]
         frequency = defaultdict(lambda: 0.0)
-        for example in self.examples:
-            frequency[example[attributeindex]] += 1.0
+        for value in column:
+            frequency[value] += 1.0
         return frequency
 
     def highest_freq_classlabel(self):
@@ -0,0 +1,108 @@
+"""
+encoder.py.
+
+Holds the BinaryEncoder class.
+"""
+from array import array
+
+from attribute import NominalAttribute
+from attributes import Attributes
+from example import MatrixExamples, SparseExamples, class_typecode
+
+
+class BinaryEncoder(object):
+    """One-hot encoding of nominal attributes with more than two values.
+
+    The layout of the encoded columns is computed once from the source
+    attributes, `encode` then fills a newly allocated MatrixExamples in a
+    single pass over the rows. The class attribute is never encoded.
+
+    Attributes
+    ----------
+        source (Attributes): attributes of the data being encoded
+        attributes (Attributes): attributes of the encoded data
+        offsets (list): first encoded column of each source column
+        expanded (list): True for source columns that are one-hot encoded
+    """
+
+    def __init__(self, attributes):
+        """Compute the encoded layout of `attributes`."""
+        self.source = attributes
+        self.attributes = Attributes()
+        self.offsets = []
+        self.expanded = []
+        for i, attribute in enumerate(attributes):
+            self.offsets.append(self.attributes.size)
+            if (i != attributes.classindex and isinstance(attribute, NominalAttribute) and
+                    len(attribute.domain) > 2):
+                self.expanded.append(True)
+                for k, v in enumerate(attribute.domain):
+                    a = NominalAttribute(name=attribute.name + str(k))
+                    a.domain = [0.0, 1.0]
+                    a.place = k
+                    a.value = v
+                    self.attributes.add(a)
+            else:
+                self.expanded.append(False)
+                self.attributes.add(attribute)
+
+    @property
+    def width(self):
+        """Return number of encoded non-class values per row."""
+        return self.attributes.size - 1
+
+    def encode_row(self, values):
+        """Return the encoded list of `values`, class value last."""
+        row = [0.0] * self.attributes.size
+        for offset, expanded, v in zip(self.offsets, self.expanded, values):
+            if expanded:
+                row[offset + int(v)] = 1.0
+            else:
+                row[offset] = v
+        return row
+
+    def encode_rows(self, rows, sparse=False):
+        """Return a new MatrixExamples holding the encoded value lists `rows`.
+
+        With `sparse` a SparseExamples holding only the non-zero values is
+        returned instead.
+        """
+        width = self.width
+        classindex = self.source.classindex
+        columns = [(offset, expanded, i) for i, (offset, expanded)
+                   in enumerate(zip(self.offsets, self.expanded)) if i != classindex]
+        if sparse:
+            return self._encode_sparse(rows, columns)
+        matrix = array('d')
+        classes = array(class_typecode(self.attributes))
+        for values in rows:
+            row = [0.0] * width
+            for offset, expanded, i in columns:
+                if expanded:
+                    row[offset + int(values[i])] = 1.0
+                else:
+                    row[offset] = values[i]
+            matrix.extend(row)
+            classes.append(values[classindex])
+        return MatrixExamples.from_arrays(self.attributes, matrix, classes)
+
+    def encode(self, examples):
+        """Return a new MatrixExamples holding the encoded `examples`."""
+        return self.encode_rows(examples.rows())
+
+    def _encode_sparse(self, rows, columns):
+        """Encode `rows` into a SparseExamples."""
+        encoded = SparseExamples(self.attributes)
+        classindex = self.source.classindex
+        for values in rows:
+            indices = []
+            data = []
+            for offset, expanded, i in columns:
+                if expanded:
+                    indices.append(offset + int(values[i]))
+                    data.append(1.0)
+                elif values[i] != 0:
+                    indices.append(offset)
+                    data.append(values[i])
+            encoded.append_sparse(indices, data, values[classindex])
+        return encoded
@@ -126,15 +126,24 @@ class Evaluator(object):
         print("Average Error: %s" % mean_errors)
         print("Stdev: %s" % standard_deviation(folds_accuracy))
 
-    def create_folds(self):
-        """Return examples in folds."""
-        folds = [[] for i in range(0, self.k)]
-        for e in self.trainset.examples:
+    def assign_folds(self):
+        """Return the fold of every training example, drawn at random."""
+        sizes = [0] * self.k
+        assignment = []
+        for _ in xrange(self.trainset.examples_size):
             # randomly assign to a fold until assigned to a fold that needs more examples
             rand = random.randint(0, self.k - 1)
-            while(len(folds[rand]) >= self.split_size):
+            while(sizes[rand] >= self.split_size):
                 rand = random.randint(0, self.k - 1)
-            folds[rand].append(e)
+            sizes[rand] += 1
+            assignment.append(rand)
+        return assignment
+
+    def create_folds(self):
+        """Return examples in folds."""
+        folds = [[] for i in range(0, self.k)]
+        for e, fold in zip(self.trainset.examples, self.assign_folds()):
+            folds[fold].append(e)
         return folds
 
     def cross_validate(self, k=10):
@@ -169,6 +178,36 @@ class Evaluator(object):
         print("Average Error: %s" % mean_errors)
         print("Stdev: %s" % standard_deviation(folds_accuracy))
 
+    def sweep_k(self, k_max, k=10):
+        """Cross validate a NearestNeighbor for every k from 1 to `k_max` in one pass.
+
+        Each example's k_max nearest neighbors outside its own fold are
+        found once, and the nearest k of them classify it for every k.
+        Returns {k: [accuracy of each fold]}.
+        """
+        self.k = k
+        folds = self.assign_folds()
+        neighbors = self.classifier.fold_neighbors(folds, k_max)
+        examples = self.trainset.examples
+        classes = [examples.get_class_value_at(i) for i in xrange(examples.size)]
+        sizes = [0] * self.k
+        correct = [[0] * self.k for _ in xrange(k_max)]
+        for i, nearest in enumerate(neighbors):
+            fold = folds[i]
+            sizes[fold] += 1
+            labels = [classes[j] for _, j in nearest]
+            for n in xrange(1, len(labels) + 1):
+                if self.classifier.find_response(labels[:n]) == classes[i]:
+                    correct[n - 1][fold] += 1
+        accuracies = {}
+        for n in xrange(1, k_max + 1):
+            accuracies[n] = [correct[n - 1][fold] / float(size)
+                             for fold, size in enumerate(sizes) if size]
+            print("%s\tfolds=%s\tk=%s" % (self.classifier.model, self.k, n))
+            print("Average Accuracy: %s" % mean(accuracies[n]))
+            print("Stdev: %s" % standard_deviation(accuracies[n]))
+        return accuracies
+
     def evaluate_testset(self):
         """Test with testset."""
         self.classifier.train(self.trainset)
@@ -3,9 +3,44 @@ example.py.
 
 Holds the Example and Examples classes.
 """
+from array import array
+from bisect import bisect_left
+from cStringIO import StringIO
+
 import all_exceptions as exceptions
 from attribute import NominalAttribute, NumericAttribute
 from bayes import mean, standard_deviation
+from stats import ColumnStats
+
+
+def class_typecode(attributes):
+    """Return the array typecode of a class column for `attributes`.
+
+    Nominal classes are stored as ints, numeric classes as doubles.
+    """
+    if attributes is None or attributes.size == 0:
+        return 'd'
+    if isinstance(attributes[attributes.classindex], NominalAttribute):
+        return 'l'
+    return 'd'
+
+
+def compact_typecode(attributes):
+    """Return the array typecode of CompactExample rows for `attributes`.
+
+    When every attribute is nominal the value indices fit in signed bytes
+    ('b') or shorts ('h'), otherwise rows are doubles.
+    """
+    if attributes is None or attributes.size == 0:
+        return 'd'
+    if not all(isinstance(a, NominalAttribute) for a in attributes):
+        return 'd'
+    largest = max(len(a.domain) for a in attributes)
+    if largest <= 127:
+        return 'b'
+    if largest <= 32767:
+        return 'h'
+    return 'd'
 
 
 class Example(object):
@@ -35,6 +70,10 @@ class Example(object):
         """Allow for indexing."""
         return self.values[val]
 
+    def __setitem__(self, i, val):
+        """Allow for item assignment."""
+        self._values[i] = val
+
     def __str__(self):
         """String representation fo example."""
         return str(self.values)
@@ -54,6 +93,70 @@ class Example(object):
         self._n = len(self._values)
 
 
+class CompactExample(object):
+    """An Example that stores its values in a typed array.
+
+    Uses `__slots__` and one array instead of an instance dict and a list
+    of boxed floats. Nominal values are stored as their index, rows of
+    all-nominal data as small integers (see compact_typecode). Writing a
+    value the array cannot hold, e.g. a float into an integer row,
+    widens the row to doubles.
+
+    Attributes
+    ----------
+        _values (array): values of this example
+    """
+
+    __slots__ = ('_values',)
+
+    def __init__(self, values=(), typecode='d'):
+        """Constructor, `values` is an iterable of numbers of `typecode`."""
+        if typecode != 'd':
+            values = [int(v) for v in values]
+        self._values = array(typecode, values)
+
+    def __iter__(self):
+        """Make iterable."""
+        return iter(self._values)
+
+    def __getitem__(self, val):
+        """Allow for indexing."""
+        return self._values[val]
+
+    def __setitem__(self, i, val):
+        """Allow for item assignment."""
+        try:
+            self._values[i] = val
+        except (TypeError, OverflowError):
+            self._widen()
+            self._values[i] = val
+
+    def __str__(self):
+        """String representation of example."""
+        return str(self._values.tolist())
+
+    def _widen(self):
+        """Store the values as doubles."""
+        self._values = array('d', self._values)
+
+    @property
+    def values(self):  # noqa
+        return self._values
+
+    @property
+    def size(self):
+        """Return length of self.values."""
+        return len(self._values)
+
+    def append(self, val):
+        """Append a value onto self._values."""
+        try:
+            self._values.append(val)
+        except (TypeError, OverflowError):
+            self._widen()
+            self._values.append(val)
+
+
 class Examples(object):
     """Stores examples for data sets for machine learning.
 
@@ -64,11 +167,17 @@ class Examples(object):
     """
 
     _attributes = None
+    _compact_key = None
+    compact = False
 
-    def __init__(self, attributes=None):
-        """Constructor, `attributes` (default=None), Attributes() object."""
+    def __init__(self, attributes=None, compact=False):
+        """Constructor, `attributes` (default=None), Attributes() object.
+
+        With `compact`, parsed lines become CompactExample objects.
+        """
         self._attributes = attributes
         self._examples = []
+        self.compact = compact
 
     def __iter__(self):
         """Make iterable."""
@@ -115,10 +224,35 @@ class Examples(object):
         """Append an example onto the example list."""
         self._examples.append(example)
 
+    def column(self, attributeindex):
+        """Return every example's value at `attributeindex`."""
+        return [e.values[attributeindex] for e in self._examples]
+
     def parse(self, line):
         """Given the attributes structure, parses into Examples."""
-        values = line.split(" ")
+        self.append(self.make_example(self.parse_values(line)))
+
+    def make_example(self, values):
+        """Return an example holding the parsed `values`."""
+        if self.compact:
+            return CompactExample(values, self._compact_typecode())
         example = Example()
+        for val in values:
+            example.append(val)
+        return example
+
+    def _compact_typecode(self):
+        """Return compact_typecode of the attributes, cached while their number is unchanged."""
+        key = (id(self._attributes), self._attributes.size if self._attributes else 0)
+        if self._compact_key != key:
+            self._compact_key = key
+            self._compact = compact_typecode(self._attributes)
+        return self._compact
+
+    def parse_values(self, line):
+        """Parse a line into a list of values using the attributes structure."""
+        values = line.split(" ")
+        parsed = []
         for i, v in enumerate(values):
             if i >= self._attributes.size:
                 e = "Out of bounds for val %s in Examples.parse." % v
@@ -130,30 +264,531 @@ class Examples(object):
             else:
                 e = "No attribute type for %s in Examples.parse()" % self._attributes[i]
                 raise exceptions.LogicError(e)
-            example.append(val)
-        self.append(example)
+            parsed.append(val)
+        return parsed
 
     def mean(self, attributeindex):
         """Return mean of all example's attribute at attributeindex."""
-        return mean([e.values[attributeindex] for e in self.examples])
+        return mean(self.column(attributeindex))
 
     def stdev(self, attributeindex):
         """Return stdev of example's attribute at attributeindex."""
-        return standard_deviation([float(e.values[attributeindex]) for e in self.examples])
+        return standard_deviation([float(v) for v in self.column(attributeindex)])
+
+    def statistics(self):
+        """Return ColumnStats of every column, computed in one pass."""
+        return ColumnStats.from_rows(self.rows(), self._attributes.size)
+
+    def rows(self):
+        """Yield the values of every example."""
+        for e in self._examples:
+            yield e.values
+
+    def formatters(self):
+        """Return one function per column turning a stored value into text."""
+        formatters = []
+        for attribute in self._attributes:
+            if isinstance(attribute, NominalAttribute):
+                labels = [str(v) for v in attribute.domain]
+                formatters.append(lambda v, labels=labels: labels[int(v)])
+            else:
+                formatters.append(str)
+        return formatters
+
+    def write(self, f):
+        """Write the examples to the file object `f`, one line per example."""
+        formatters = self.formatters()
+        write = f.write
+        for values in self.rows():
+            write(" ".join([fmt(v) for fmt, v in zip(formatters, values)]))
+            write("\n")
 
     def __str__(self):
         """Return string reprsentation of Examples."""
-        # self._examples.values
-        string = ""
-        for e in self._examples:
-            for i, v in enumerate(e.values):
-                if isinstance(self._attributes[i], NominalAttribute):
-                    v = int(v)
-                    string = string + str(self._attributes[i].domain[v])
-                else:
-                    string = string + str(v)
-                if i == len(e.values) - 1:
-                    string = string + "\n"
-                else:
-                    string = string + " "
-        return string
+        out = StringIO()
+        self.write(out)
+        return out.getvalue()
+
+
+class ExampleView(object):
+    """A row of a MatrixExamples store, looks like an Example.
+
+    Nothing is copied, reads and writes go straight to the store's arrays.
+
+    Attributes
+    ----------
+        _store (MatrixExamples): store holding the row
+        _row (int): index of the row in the store
+    """
+
+    __slots__ = ('_store', '_row')
+
+    def __init__(self, store, row):
+        """Constructor, `row` of the MatrixExamples `store`."""
+        self._store = store
+        self._row = row
+
+    def __iter__(self):
+        """Make iterable."""
+        return iter(self.values)
+
+    def __getitem__(self, val):
+        """Allow for indexing."""
+        if isinstance(val, slice):
+            return self.values[val]
+        return self._store.value_at(self._row, val)
+
+    def __setitem__(self, i, val):
+        """Allow for item assignment."""
+        self._store.set_value_at(self._row, i, val)
+
+    def __str__(self):
+        """String representation of example."""
+        return str(self.values)
+
+    @property
+    def values(self):
+        """Return a copy of the row's values as a list."""
+        return self._store.row_values(self._row)
+
+    @property
+    def size(self):
+        """Return number of values in the row."""
+        return self._store.width + 1
+
+    @property
+    def row(self):
+        """Return index of the row in the store."""
+        return self._row
+
+    def append(self, val):
+        """Rows of a matrix are fixed width."""
+        raise exceptions.LogicError("Cannot append a value to an ExampleView.")
+
+
+class MatrixExamples(Examples):
+    """Stores examples column-ready in contiguous arrays.
+
+    All non-class values live in one row-major array of doubles, the class
+    values in a parallel array (ints for nominal classes). Examples are
+    handed out as ExampleView objects so the Examples API keeps working.
+
+    Attributes
+    ----------
+        _attributes (Attributes): attributes.Attributes object
+        _matrix (array): row-major values, `width` per row
+        _classes (array): class value of each row
+    """
+
+    def __init__(self, attributes=None):
+        """Constructor, `attributes` (default=None), Attributes() object."""
+        self._attributes = attributes
+        self._matrix = array('d')
+        self._classes = array(self._class_typecode())
+
+    def __iter__(self):
+        """Make iterable."""
+        return (ExampleView(self, i) for i in xrange(self.size))
+
+    def __getitem__(self, val):
+        """Allow for indexing."""
+        if isinstance(val, slice):
+            return [ExampleView(self, i) for i in xrange(*val.indices(self.size))]
+        if val < 0:
+            val += self.size
+        if not 0 <= val < self.size:
+            raise IndexError("MatrixExamples index out of range")
+        return ExampleView(self, val)
+
+    @classmethod
+    def from_arrays(cls, attributes, matrix, classes):
+        """Build a store around existing `matrix` and `classes` arrays."""
+        if len(matrix) != len(classes) * (attributes.size - 1):
+            e = "Matrix of %s values does not fit %s rows." % (len(matrix), len(classes))
+            raise exceptions.LogicError(e)
+        examples = cls(attributes)
+        examples._matrix = matrix
+        examples._classes = classes
+        return examples
+
+    def to_examples(self, compact=False):
+        """Return a copy of the rows as a list backed Examples."""
+        nominal = [isinstance(a, NominalAttribute) for a in self._attributes]
+        examples = Examples(self._attributes, compact=compact)
+        for row in xrange(self.size):
+            values = self.row_values(row)
+            if not compact:
+                values = [int(v) if is_nominal else v for is_nominal, v in zip(nominal, values)]
+            examples.append(examples.make_example(values))
+        return examples
+
+    def _class_typecode(self):
+        return class_typecode(self._attributes)
+
+    @property
+    def attributes(self):
+        """Return attributes."""
+        return self._attributes
+
+    @attributes.setter
+    def attributes(self, val):
+        """Set attributes, only allowed while the store is empty."""
+        if self.size and (val is None or val.size != self._attributes.size):
+            e = "Cannot change the width of a non-empty MatrixExamples."
+            raise exceptions.LogicError(e)
+        self._attributes = val
+        if not self.size:
+            self._classes = array(self._class_typecode())
+
+    @property
+    def examples(self):
+        """Return list of row views."""
+        return list(self)
+
+    @examples.setter
+    def examples(self, val):
+        """Replace the stored rows with `val`.
+
+        The values are read before the arrays are cleared, `val` may hold
+        views of this store.
+        """
+        rows = [example if isinstance(example, list) else list(example) for example in val]
+        self._matrix = array('d')
+        self._classes = array(self._class_typecode())
+        for values in rows:
+            self.append(values)
+
+    @property
+    def matrix(self):
+        """Return the raw row-major array of non-class values."""
+        return self._matrix
+
+    @property
+    def classes(self):
+        """Return the raw array of class values."""
+        return self._classes
+
+    @classes.setter
+    def classes(self, val):
+        """Replace the class values, stored as doubles unless all are integers."""
+        if len(val) != self.size:
+            e = "Got %s class values for %s rows." % (len(val), self.size)
+            raise exceptions.LogicError(e)
+        if all(v == int(v) for v in val):
+            self._classes = array(self._class_typecode(), [int(v) for v in val])
+        else:
+            self._classes = array('d', val)
+
+    @property
+    def width(self):
+        """Return number of non-class values per row."""
+        return self._attributes.size - 1
+
+    @property
+    def size(self):
+        """Return number of rows."""
+        return len(self._classes)
+
+    def append(self, example):
+        """Append an Example, row view or list of values as a new row."""
+        values = example if isinstance(example, list) else list(example)
+        if len(values) != self._attributes.size:
+            e = "Example has %s values, expected %s." % (len(values), self._attributes.size)
+            raise exceptions.LogicError(e)
+        self._matrix.extend(values[:-1])
+        self._classes.append(self._class_value(values[-1]))
+
+    def parse(self, line):
+        """Given the attributes structure, parses a line into a new row."""
+        values = self.parse_values(line)
+        if len(values) != self._attributes.size:
+            e = "Example has %s values, expected %s." % (len(values), self._attributes.size)
+            raise exceptions.LogicError(e)
+        self._matrix.extend(values[:-1])
+        self._classes.append(values[-1])
+
+    def _class_value(self, val):
+        """Check `val` fits in the class column."""
+        if self._classes.typecode == 'l':
+            if val != int(val):
+                e = "Class value %s is not a nominal index." % val
+                raise exceptions.LogicError(e)
+            return int(val)
+        return val
+
+    def rows(self):
+        """Yield the values of every row as a list."""
+        for row in xrange(self.size):
+            yield self.row_values(row)
+
+    def column(self, attributeindex):
+        """Return all values of the column at `attributeindex` as an array."""
+        if attributeindex < 0:
+            attributeindex += self.width + 1
+        if attributeindex == self.width:
+            return self._classes
+        return self._matrix[attributeindex::self.width]
+
+    def get_class_value_at(self, i):
+        """Return class value of example at i."""
+        return self._classes[i]
+
+    def value_at(self, row, col):
+        """Return value of `row` at column `col`."""
+        width = self.width
+        if col < 0:
+            col += width + 1
+        if col == width:
+            return self._classes[row]
+        if not 0 <= col < width:
+            raise IndexError("ExampleView index out of range")
+        return self._matrix[row * width + col]
+
+    def set_value_at(self, row, col, val):
+        """Set value of `row` at column `col`."""
+        width = self.width
+        if col < 0:
+            col += width + 1
+        if col == width:
+            self._classes[row] = self._class_value(val)
+        elif 0 <= col < width:
+            self._matrix[row * width + col] = val
+        else:
+            raise IndexError("ExampleView assignment index out of range")
+
+    def row_values(self, row):
+        """Return a list copy of the values of `row`, class value last."""
+        width = self.width
+        values = self._matrix[row * width:(row + 1) * width].tolist()
+        values.append(self._classes[row])
+        return values
+
+
+class SparseExample(object):
+    """A row of a SparseExamples store, looks like an Example.
+
+    Only the non-zero values of the row are stored. Rows are read-only:
+    writing a value could change which entries are stored.
+
+    Attributes
+    ----------
+        _store (SparseExamples): store holding the row
+        _row (int): index of the row in the store
+    """
+
+    __slots__ = ('_store', '_row')
+
+    def __init__(self, store, row):
+        """Constructor, `row` of the SparseExamples `store`."""
+        self._store = store
+        self._row = row
+
+    def __iter__(self):
+        """Make iterable."""
+        return iter(self.values)
+
+    def __getitem__(self, val):
+        """Allow for indexing."""
+        if isinstance(val, slice):
+            return self.values[val]
+        return self._store.value_at(self._row, val)
+
+    def __setitem__(self, i, val):
+        """Sparse rows are read-only."""
+        raise exceptions.LogicError("Cannot assign to a SparseExample.")
+
+    def __str__(self):
+        """String representation of example."""
+        return str(self.values)
+
+    @property
+    def values(self):
+        """Return a dense list copy of the row's values."""
+        return self._store.row_values(self._row)
+
+    @property
+    def size(self):
+        """Return number of values in the row, zeros included."""
+        return self._store.width + 1
+
+    @property
+    def row(self):
+        """Return index of the row in the store."""
+        return self._row
+
+    def nonzeros(self):
+        """Return (indices, values) lists of the non-zero non-class values."""
+        return self._store.row_nonzeros(self._row)
+
+    def append(self, val):
+        """Sparse rows are fixed width."""
+        raise exceptions.LogicError("Cannot append a value to a SparseExample.")
+
+
+class SparseExamples(Examples):
+    """Stores examples in compressed sparse row (CSR) form.
+
+    The non-zero non-class values of row r are data[indptr[r]:indptr[r + 1]]
+    at columns indices[indptr[r]:indptr[r + 1]], in increasing column order.
+    Class values are kept in their own array as in MatrixExamples.
+
+    Attributes
+    ----------
+        _attributes (Attributes): attributes.Attributes object
+        _indptr (array): start of each row in indices/data, plus the end
+        _indices (array): column of each stored value
+        _data (array): stored values
+        _classes (array): class value of each row
+    """
+
+    def __init__(self, attributes=None):
+        """Constructor, `attributes` (default=None), Attributes() object."""
+        self._attributes = attributes
+        self._indptr = array('l', [0])
+        self._indices = array('l')
+        self._data = array('d')
+        self._classes = array(class_typecode(attributes))
+
+    @classmethod
+    def from_arrays(cls, attributes, indptr, indices, data, classes):
+        """Build a store around existing CSR arrays and `classes`."""
+        if (len(indptr) != len(classes) + 1 or len(indices) != len(data) or
+                len(data) != indptr[-1]):
+            e = "CSR arrays do not fit %s rows." % len(classes)
+            raise exceptions.LogicError(e)
+        examples = cls(attributes)
+        examples._indptr = indptr
+        examples._indices = indices
+        examples._data = data
+        examples._classes = classes
+        return examples
+
+    def __iter__(self):
+        """Make iterable."""
+        return (SparseExample(self, i) for i in xrange(self.size))
+
+    def __getitem__(self, val):
+        """Allow for indexing."""
+        if isinstance(val, slice):
+            return [SparseExample(self, i) for i in xrange(*val.indices(self.size))]
+        if val < 0:
+            val += self.size
+        if not 0 <= val < self.size:
+            raise IndexError("SparseExamples index out of range")
+        return SparseExample(self, val)
+
+    @property
+    def examples(self):
+        """Return list of row views."""
+        return list(self)
+
+    @property
+    def indptr(self):
+        """Return the raw row pointer array."""
+        return self._indptr
+
+    @property
+    def indices(self):
+        """Return the raw column index array."""
+        return self._indices
+
+    @property
+    def data(self):
+        """Return the raw array of stored values."""
+        return self._data
+
+    @property
+    def classes(self):
+        """Return the raw array of class values."""
+        return self._classes
+
+    @classes.setter
+    def classes(self, val):
+        """Replace the class values, stored as doubles unless all are integers."""
+        if len(val) != self.size:
+            e = "Got %s class values for %s rows." % (len(val), self.size)
+            raise exceptions.LogicError(e)
+        if all(v == int(v) for v in val):
+            self._classes = array(class_typecode(self._attributes), [int(v) for v in val])
+        else:
+            self._classes = array('d', val)
+
+    @property
+    def width(self):
+        """Return number of non-class values per row."""
+        return self._attributes.size - 1
+
+    @property
+    def size(self):
+        """Return number of rows."""
+        return len(self._classes)
+
+    @property
+    def nnz(self):
+        """Return number of stored values."""
+        return len(self._data)
+
+    def append_sparse(self, indices, values, classvalue):
+        """Append a row given its non-zero `indices` and `values`."""
+        self._indices.extend(indices)
+        self._data.extend(values)
+        self._indptr.append(len(self._data))
+        self._classes.append(classvalue)
+
+    def append(self, example):
+        """Append an Example, row view or list of values as a new row."""
+        values = example if isinstance(example, list) else list(example)
+        if len(values) != self._attributes.size:
+            e = "Example has %s values, expected %s." % (len(values), self._attributes.size)
+            raise exceptions.LogicError(e)
+        indices = [i for i, v in enumerate(values[:-1]) if v != 0]
+        self.append_sparse(indices, [values[i] for i in indices], values[-1])
+
+    def parse(self, line):
+        """Given the attributes structure, parses a line into a new row."""
+        self.append(self.parse_values(line))
+
+    def rows(self):
+        """Yield the dense values of every row as a list."""
+        for row in xrange(self.size):
+            yield self.row_values(row)
+
+    def column(self, attributeindex):
+        """Return all values of the column at `attributeindex`."""
+        if attributeindex < 0:
+            attributeindex += self.width + 1
+        if attributeindex == self.width:
+            return self._classes
+        return [self.value_at(row, attributeindex) for row in xrange(self.size)]
+
+    def get_class_value_at(self, i):
+        """Return class value of example at i."""
+        return self._classes[i]
+
+    def value_at(self, row, col):
+        """Return value of `row` at column `col`."""
+        width = self.width
+        if col < 0:
+            col += width + 1
+        if col == width:
+            return self._classes[row]
+        if not 0 <= col < width:
+            raise IndexError("SparseExample index out of range")
+        start, end = self._indptr[row], self._indptr[row + 1]
+        k = bisect_left(self._indices, col, start, end)
+        if k < end and self._indices[k] == col:
+            return self._data[k]
+        return 0.0
+
+    def row_nonzeros(self, row):
+        """Return (indices, values) lists of the stored values of `row`."""
+        start, end = self._indptr[row], self._indptr[row + 1]
+        return self._indices[start:end].tolist(), self._data[start:end].tolist()
+
+    def row_values(self, row):
+        """Return a dense list copy of the values of `row`, class value last."""
+        values = [0.0] * (self.width + 1)
+        for i, v in zip(*self.row_nonzeros(row)):
+            values[i] = v
+        values[-1] = self._classes[row]
+        return values
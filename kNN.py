@@ -3,29 +3,188 @@ kNN.py.
 
 Implementation of k-nearest neighbor in O(k) space.
 """
+import heapq
 import logging
 
 from math import sqrt
-from operator import itemgetter
+from multiprocessing import Pool
+from multiprocessing.sharedctypes import RawArray
 from collections import defaultdict
 
+from all_exceptions import LogicError
 from classifier import Classifier
 from attributes import NominalAttribute
+from example import Examples, MatrixExamples, SparseExample, SparseExamples
+from spatial import BruteForce, KDTree, LSHIndex, VPTree
 
 
 logger = logging.getLogger(__name__)
 
 
+_shared = None  # (classifier, queries, width) that forked workers inherit
+
+
+def _classify_block(block):
+    """Classify the shared query rows start to stop in a worker process."""
+    knn, queries, width = _shared
+    start, stop = block
+    query, k = knn._index.query, knn.k
+    classes = knn.train_examples.get_class_value_at
+    labels = []
+    for row in xrange(start, stop):
+        neighbors = query(queries[row * width:(row + 1) * width], k)
+        labels.append(knn.find_response([classes(i) for _, i in neighbors]))
+    return labels
+
+
 class NearestNeighbor(Classifier):  # noqa
 
     """k nearest neighbor class."""
 
     model = 'kNN'
 
-    def __init__(self, trainset, k=3):
-        """Initialize the dataset and k."""
+    INDEXES = ('auto', 'kdtree', 'vptree', 'lsh')
+
+    def __init__(self, trainset=None, k=3, index=None, tables=10):
+        """Initialize the dataset and k.
+
+        `index` is the spatial index train() builds over the training
+        examples: 'kdtree' when every attribute is numeric or binary,
+        'vptree' for any attributes, 'auto' to pick one of them, or None to
+        compare each query with every training example. These are exact,
+        'lsh' is approximate: its number of hash `tables` trades speed
+        (fewer) for finding more of the true neighbors (more).
+        """
+        if index is not None and index not in self.INDEXES:
+            raise LogicError("Unknown kNN index %s." % index)
         self._trainset = trainset
         self.k = k
+        self.index = index
+        self.tables = tables
+        self._index = None
+        self._indexed = None
+        self._removed = set()
+
+    def _train(self):
+        """Build the search structure over the training examples."""
+        examples = self.train_examples
+        if examples is not self._indexed:  # a new training set
+            self._removed = set()
+        self._index = None
+        self._indexed = None
+        if isinstance(examples, SparseExamples):
+            if self.index is not None:
+                raise LogicError("A kNN index needs dense training examples.")
+            return
+        width = self.attributes.size - 1
+        nominal = self._nominal_mask()
+        euclidean = all(len(a.domain) <= 2 for a, is_nominal in zip(self.attributes, nominal)
+                        if is_nominal)
+        if self.index == 'kdtree' and not euclidean:
+            raise LogicError("A k-d tree needs numeric or binary attributes, use 'vptree'.")
+        self._index = self._engine(lambda: (values[:width] for values in examples.rows()),
+                                   examples.column)
+        self._index.removed = self._removed
+        self._indexed = examples
+
+    def _engine(self, rows, column, brute_force=False):
+        """Return the search structure over the training values.
+
+        `rows()` yields the non-class values of each row, `column(i)`
+        returns every value of attribute i. With `brute_force` a BruteForce
+        search is returned whatever the index.
+        """
+        nominal = self._nominal_mask()
+        if brute_force or self.index is None:
+            return BruteForce([column(i) for i in xrange(len(nominal))], nominal)
+        rows = [list(values) for values in rows()]
+        if self.index == 'lsh':
+            return LSHIndex(rows, nominal, tables=self.tables)
+        euclidean = all(len(a.domain) <= 2 for a, is_nominal in zip(self.attributes, nominal)
+                        if is_nominal)
+        if self.index == 'vptree' or not euclidean:
+            return VPTree(rows, nominal)
+        return KDTree(rows)
+
+    def partial_fit(self, dataset):
+        """Learn the examples of `dataset`, returns their training indices.
+
+        The first call trains on `dataset`, later calls add its examples.
+        """
+        if self.trainset is None:
+            self.train(dataset)
+            return range(self.train_examples.size)
+        return self.add_examples(dataset)
+
+    def add_examples(self, dataset):
+        """Append the examples of `dataset` (or a list of examples), returns their indices.
+
+        They are appended to the training examples and inserted into the
+        search structure, which is not rebuilt.
+        """
+        examples = dataset if isinstance(dataset, (Examples, list)) else dataset.examples
+        if self._indexed is not self.train_examples:
+            self._train()
+        storage = self.train_examples
+        if isinstance(storage, SparseExamples) or isinstance(examples, SparseExamples):
+            raise LogicError("Incremental kNN updates need dense examples.")
+        width = self.attributes.size - 1
+        indices = []
+        for example in examples:
+            storage.append(example)
+            indices.append(self._index.add(list(example.values[:width])))
+        return indices
+
+    def remove_examples(self, indices):
+        """Remove the training examples at `indices` from every later query.
+
+        Their indices are kept as tombstones, so the indices of the other
+        training examples do not change.
+        """
+        if isinstance(self.train_examples, SparseExamples):
+            raise LogicError("Incremental kNN updates need dense examples.")
+        if self._indexed is not self.train_examples:
+            self._train()
+        size = self.train_examples.size
+        for index in indices:
+            if not 0 <= index < size or index in self._removed:
+                raise LogicError("No training example at index %s." % index)
+        self._removed.update(indices)
+
+    @property
+    def live_size(self):
+        """Return the number of training examples that were not removed."""
+        return self.train_examples.size - len(self._removed)
+
+    def _nominal_mask(self):
+        """Return True for each nominal non-class attribute."""
+        width = self.attributes.size - 1
+        return [isinstance(a, NominalAttribute) for a in self.attributes][:width]
+
+    def fold_neighbors(self, folds, k_max):
+        """Return the k_max nearest (distance, index) pairs of every training row from other folds.
+
+        `folds` holds the fold of each training row. A row's distances to
+        every other row are reduced to its nearest k_max right away, so
+        memory stays linear in the number of rows.
+        """
+        examples = self.train_examples
+        if isinstance(examples, SparseExamples):
+            raise LogicError("fold_neighbors needs dense training examples.")
+        if self._removed and self._indexed is examples:
+            raise LogicError("fold_neighbors needs a training set without removed examples.")
+        width = self.attributes.size - 1
+        if isinstance(self._index, BruteForce) and self._indexed is examples:
+            engine = self._index
+        else:  # distances() needs a BruteForce whatever the index
+            engine = self._engine(lambda: (values[:width] for values in examples.rows()),
+                                  examples.column, brute_force=True)
+        neighbors = []
+        for values, fold in zip(examples.rows(), folds):
+            dists = engine.distances(list(values[:width]))
+            neighbors.append(heapq.nsmallest(k_max, [
+                (dist, j) for j, (dist, other) in enumerate(zip(dists, folds)) if other != fold]))
+        return neighbors
 
     def _classify(self, example):
         """Find neighbor and predict based off training on an example."""
@@ -33,21 +192,132 @@ class NearestNeighbor(Classifier):  # noqa
         class_label = self.find_response(neighbors)
         return class_label
 
+    def classify_batch(self, dataset, n_jobs=1):
+        """Classify every example of `dataset`, returns the class labels in order.
+
+        With n_jobs > 1 blocks of examples are classified in that many
+        processes. Sparse examples are classified in this process.
+        """
+        examples = dataset if isinstance(dataset, Examples) else dataset.examples
+        if isinstance(self.train_examples, SparseExamples) or isinstance(examples, SparseExamples):
+            return [self._classify(e) for e in examples]
+        if n_jobs > 1 and examples.size > 1:
+            return self._classify_parallel(examples, n_jobs)
+        classes = self.train_examples.get_class_value_at
+        return [self.find_response([classes(i) for _, i in neighbors])
+                for neighbors in self.kneighbors(examples)]
+
+    def _classify_parallel(self, examples, n_jobs):
+        """Classify dense `examples` in n_jobs worker processes.
+
+        The search structure is built here and published with the query
+        rows, copied once into shared memory, before the pool forks, so
+        the workers inherit them instead of rebuilding or unpickling them.
+        Tasks are (start, stop) row ranges, so no examples are pickled.
+        """
+        global _shared
+        if self._indexed is not self.train_examples:
+            self._train()
+        width = self.attributes.size - 1
+        queries = RawArray('d', examples.size * width)
+        for row, values in enumerate(examples.rows()):
+            queries[row * width:(row + 1) * width] = values[:width]
+        step = -(-examples.size // (4 * n_jobs))
+        blocks = [(start, min(start + step, examples.size))
+                  for start in xrange(0, examples.size, step)]
+        _shared = (self, queries, width)
+        try:
+            pool = Pool(n_jobs)
+            try:
+                labels = pool.map(_classify_block, blocks)
+            finally:
+                pool.close()
+                pool.join()
+        finally:
+            _shared = None
+        return [label for block in labels for label in block]
+
+    def kneighbors(self, dataset, k=None):
+        """Return the k nearest (distance, training index) pairs of every example of `dataset`."""
+        examples = dataset if isinstance(dataset, Examples) else dataset.examples
+        if self._indexed is not self.train_examples:
+            self._train()
+        if isinstance(self.train_examples, SparseExamples):
+            return [self._sparse_neighbors(e, k or self.k) for e in examples]
+        width = self.attributes.size - 1
+        query, k = self._index.query, k or self.k
+        return [query(list(values[:width]), k) for values in examples.rows()]
+
+    def search(self, values, k=None):
+        """Return the k nearest (distance, training index) pairs to a list of values.
+
+        The class value may be last in `values`. The search structure is
+        built first if train() was not called for the current training set.
+        """
+        if self._indexed is not self.train_examples:
+            self._train()
+        if isinstance(self.train_examples, SparseExamples):
+            return self._sparse_neighbors(values, k or self.k)
+        width = self.attributes.size - 1
+        return self._index.query(list(values[:width]), k or self.k)
+
     def find_neighbor(self, test_example):
-        """Find `test_example's` closest neighbor."""
-        n = test_example.size
-        # Create list of tuples --> [(training_example, distance to test_example), ... ]
+        """Find the class values of `test_example's` k closest neighbors."""
+        examples = self.train_examples
+        if isinstance(examples, SparseExamples):
+            neighbors = self._sparse_neighbors(test_example, self.k)
+        else:
+            neighbors = self.search(test_example.values)
+        return [examples.get_class_value_at(i) for _, i in neighbors]
+
+    def _sparse_neighbors(self, values, k):
+        """Return the k nearest (distance, training index) pairs of sparse training examples.
+
+        `values` is a SparseExample or the dense values of an example,
+        the class value may be last.
+        """
+        if isinstance(values, SparseExample):
+            query = dict(zip(*values.nonzeros()))
+        else:
+            width = self.attributes.size - 1
+            query = dict((i, v) for i, v in enumerate(list(values)[:width]) if v)
+        return heapq.nsmallest(k, ((dist, i) for i, dist in enumerate(self._sparse_dists(query))))
+
+    def _sparse_dists(self, query):
+        """Return the distance of every sparse training example to the {index: value} `query`.
+
+        Only the non-zero values of each training row are visited.
+        """
+        examples = self.train_examples
+        indptr, indices, data = examples.indptr, examples.indices, examples.data
+        query_norm = sum(v * v for v in query.itervalues())
+        get = query.get
         dists = []
-        for i, e in enumerate(self.train_examples):
-            dist = self.euclidean_dist(test_example, e, n)
-            class_value = self.train_examples.get_class_value_at(i)
-            dists.append((class_value, dist))
-        dists.sort(key=itemgetter(1))
-        neighbors = [dists[i][0] for i in xrange(self.k)]  # closest self.k neighbors
-        return neighbors
+        for row in xrange(examples.size):
+            dist = query_norm
+            for k in xrange(indptr[row], indptr[row + 1]):
+                v = data[k]
+                dist += v * (v - 2 * get(indices[k], 0.0))
+            dists.append(sqrt(max(dist, 0.0)))
+        return dists
+
+    def sparse_dist(self, example1, example2):
+        """Euclidean distance between two sparse examples.
+
+        Sparse examples come out of one-hot encoding, where nominal values
+        are 0/1 so a mismatch costs the same 1 as in euclidean_dist.
+        """
+        b = dict(zip(*example2.nonzeros()))
+        dist = 0.0
+        for i, v in zip(*example1.nonzeros()):
+            dist += (v - b.pop(i, 0.0))**2
+        dist += sum(v * v for v in b.itervalues())
+        return sqrt(dist)
 
     def euclidean_dist(self, example1, example2, length):
         """Sum of squared differences between two examples."""
+        if isinstance(example1, SparseExample) and isinstance(example2, SparseExample):
+            return self.sparse_dist(example1, example2)
         dist = 0
         for i in xrange(example1.size - 1):
             nominal = isinstance(self.attributes[i], NominalAttribute)
@@ -57,10 +327,54 @@ class NearestNeighbor(Classifier):  # noqa
                 dist += 1
         return sqrt(dist)
 
+    def get_state(self):
+        """Return k and the live training rows as matrix (or CSR) and class arrays."""
+        examples = self.train_examples
+        if self._removed and self._indexed is examples:
+            live = MatrixExamples(self.attributes)
+            for i, values in enumerate(examples.rows()):
+                if i not in self._removed:
+                    live.append(values)
+            examples = live
+        if isinstance(examples, SparseExamples):
+            return {'k': self.k, 'index': self.index, 'tables': self.tables, 'sparse': True}, [
+                ('indptr', examples.indptr), ('indices', examples.indices),
+                ('data', examples.data), ('classes', examples.classes)]
+        if not isinstance(examples, MatrixExamples):
+            matrix = MatrixExamples(self.attributes)
+            for values in examples.rows():
+                matrix.append(values)
+            examples = matrix
+        return {'k': self.k, 'index': self.index, 'tables': self.tables, 'sparse': False}, [
+            ('matrix', examples.matrix), ('classes', examples.classes)]
+
+    def set_state(self, params, arrays):
+        """Restore the training rows of get_state into the trainset, rebuild the index."""
+        self.k = params['k']
+        self.index = params.get('index')
+        self.tables = params.get('tables', 10)
+        self._index = None
+        self._indexed = None
+        self._removed = set()
+        attributes = self.trainset.attributes
+        if params['sparse']:
+            self.trainset.examples = SparseExamples.from_arrays(
+                attributes, arrays['indptr'], arrays['indices'], arrays['data'],
+                arrays['classes'])
+        else:
+            self.trainset.examples = MatrixExamples.from_arrays(
+                attributes, arrays['matrix'], arrays['classes'])
+        self._train()
+
     def find_response(self, neighbors):
-        """Take a list of neighbors and classify from the neighbors of the kNN."""
+        """Return the most common class label of `neighbors`, nearest first.
+
+        Ties go to the label of the nearest neighbor among them.
+        """
         counts = defaultdict(int)
         for neighbor in neighbors:
-            counts[neighbor] += 1  # last item in list is the predicted value
-        response = max(counts.items())[0]
-        return response
+            counts[neighbor] += 1
+        most = max(counts.itervalues())
+        for neighbor in neighbors:
+            if counts[neighbor] == most:
+                return neighbor
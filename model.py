@@ -0,0 +1,99 @@
+"""
+model.py.
+
+Saved classifiers. A model file holds everything needed to classify raw
+.mff rows without the training data:
+
+    header    magic 'BPPM', format version, length of the description
+    JSON      classifier class, schema, fitted preprocessor, parameters and
+              the typecode, item size and length of each array
+    arrays    raw little-endian bytes of the classifier's arrays, in order
+
+Parameters are small and go in the JSON; weights, trees and training rows
+are arrays so loading them is a read per array.
+"""
+import json
+import os
+import struct
+import sys
+from array import array
+
+from all_exceptions import LogicError
+from attributes import Attributes
+from classifier import Classifier
+from dataset import DataSet
+from preprocessor import Preprocessor
+
+
+MAGIC = 'BPPM'
+VERSION = 1
+_HEADER = struct.Struct('<4sIQ')
+
+
+def _classes(base=Classifier):
+    """Yield every imported subclass of `base`."""
+    for klass in base.__subclasses__():
+        yield klass
+        for subclass in _classes(klass):
+            yield subclass
+
+
+def save(classifier, path):
+    """Write the trained `classifier` to `path`."""
+    params, arrays = classifier.get_state()
+    trainset = classifier.trainset
+    preprocessor = getattr(trainset, 'preprocessor', None)
+    arrays = [(name, values if isinstance(values, array) else array(values.typecode, values))
+              for name, values in arrays]
+    description = {'class': type(classifier).__name__,
+                   'model': getattr(classifier, 'model', None),
+                   'name': trainset.name,
+                   'schema': str(trainset.attributes),
+                   'preprocessor': preprocessor.to_dict() if preprocessor else None,
+                   'params': params,
+                   'arrays': [[name, values.typecode, values.itemsize, len(values)]
+                              for name, values in arrays]}
+    text = json.dumps(description)
+    tmp = '%s.%s.tmp' % (path, os.getpid())
+    with open(tmp, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(text)))
+        f.write(text)
+        for _, values in arrays:
+            if sys.byteorder == 'big':
+                values = array(values.typecode, values)
+                values.byteswap()
+            values.tofile(f)
+    os.rename(tmp, path)
+
+
+def load(path):
+    """Read the classifier saved in `path`."""
+    with open(path, 'rb') as f:
+        head = f.read(_HEADER.size)
+        if len(head) != _HEADER.size:
+            raise LogicError("%s is not a model file." % path)
+        magic, version, length = _HEADER.unpack(head)
+        if magic != MAGIC or version != VERSION:
+            raise LogicError("%s is not a version %s model file." % (path, VERSION))
+        description = json.loads(f.read(length))
+        arrays = {}
+        for name, typecode, itemsize, n in description['arrays']:
+            values = array(str(typecode))
+            if values.itemsize != itemsize:
+                e = "Model array %s was written with %s byte items." % (name, itemsize)
+                raise LogicError(e)
+            values.fromfile(f, n)
+            if sys.byteorder == 'big':
+                values.byteswap()
+            arrays[str(name)] = values
+    classes = dict((klass.__name__, klass) for klass in _classes())
+    if description['class'] not in classes:
+        raise LogicError("Unknown classifier %s, import its module first." % description['class'])
+    klass = classes[description['class']]
+    trainset = DataSet(attributes=Attributes.from_string(str(description['schema'])),
+                       name=description['name'])
+    if description['preprocessor']:
+        trainset.preprocessor = Preprocessor.from_dict(description['preprocessor'])
+    classifier = klass(trainset)  # __init__ sets every attribute, set_state the trained ones
+    classifier.set_state(description['params'], arrays)
+    return classifier
@@ -1,7 +1,10 @@
 """NeuralNetwork.py."""
 
+from array import array
 from classifier import Classifier
+from all_exceptions import LogicError
 from attributes import NominalAttribute
+from example import SparseExample
 import random
 import math
 import sys
@@ -47,13 +50,27 @@ class NeuralNetwork(Classifier):
             if not isinstance(di, list):
                 di = [di]
             self.d.append(di)
-            vals = example.values[:examples.attributes.classindex]  # add bias
-            vals.append(-1.0)
-            self.z.append(vals)
+            self.z.append(self.get_input(example))
         self.I = self.trainset.attributes.size  # input dimension
         self.K = self.trainset.attributes.class_size  # output dimension
         self.o = [0.0] * self.K
 
+    def get_input(self, example):
+        """Return the input vector of `example` with the bias appended.
+
+        Sparse examples give an (indices, values) tuple of the non-zero
+        inputs so the forward pass and update skip the zeros.
+        """
+        classindex = self.trainset.attributes.classindex
+        if isinstance(example, SparseExample):
+            indices, values = example.nonzeros()
+            indices.append(classindex)  # bias input sits after the last attribute
+            values.append(-1.0)
+            return (indices, values)
+        vals = example.values[:classindex]  # add bias
+        vals.append(-1.0)
+        return vals
+
     def init_weight_matrices(self):
         """Initialize the weight matrices to random weights."""
         self.W = [[random.uniform(-.1, .1) for i in xrange(self.J)] for k in xrange(self.K)]  # output x hidden
@@ -91,10 +108,16 @@ class NeuralNetwork(Classifier):
     def step2(self, z):
         """Training step starts here. Input is presented and the layers outputs are computed."""
         # Create y vector
+        sparse = isinstance(z, tuple)
         for j in xrange(self.J):
             current_sum = 0.0
-            for i in range(self.I):
-                current_sum += z[i] * self.V[j][i]
+            if sparse:
+                Vj = self.V[j]
+                for i, v in zip(*z):
+                    current_sum += v * Vj[i]
+            else:
+                for i in range(self.I):
+                    current_sum += z[i] * self.V[j][i]
             self.y[j] = f(current_sum)
         # Create o vector
         for k in xrange(self.K):
@@ -139,6 +162,12 @@ class NeuralNetwork(Classifier):
 
     def step6(self, inputindex):
         """Adjust weights of hidden layers."""
+        z = self.z[inputindex]
+        if isinstance(z, tuple):  # only non-zero inputs change their weights
+            for i, v in zip(*z):
+                for j in xrange(self.J):
+                    self.V[j][i] = self.V[j][i] + self.n * self.error_signal_y[j] * v
+            return
         for i in xrange(self.I):
             for j in xrange(self.J):
                 self.V[j][i] = self.V[j][i] + self.n * self.error_signal_y[j] * self.z[inputindex][i]
@@ -149,13 +178,32 @@ class NeuralNetwork(Classifier):
         # through the network forward pass
         # get _>o, get numbers in output layer
         # return the index of the component of _>o that is max
-        vals = example.values[:self.trainset.attributes.classindex]
-        vals.append(-1)
-        classification = self.step2(vals)[0]
+        classification = self.step2(self.get_input(example))[0]
         if isinstance(self.trainset.attributes[-1], NominalAttribute):
             classification = int(round(classification))
         return classification
 
+    def get_state(self):
+        """Return the network settings and the weights W and V, row by row."""
+        if not hasattr(self, 'W'):
+            raise LogicError("NeuralNetwork must be trained before it is saved.")
+        params = {'n': self.n, 'J': self.J, 'I': self.I, 'K': self.K,
+                  'max_error': self.max_error}
+        W = array('d', [w for row in self.W for w in row])
+        V = array('d', [v for row in self.V for v in row])
+        return params, [('W', W), ('V', V)]
+
+    def set_state(self, params, arrays):
+        """Restore the weights of get_state, ready to classify."""
+        self.n = params['n']
+        self.J, self.I, self.K = params['J'], params['I'], params['K']
+        self.max_error = params['max_error']
+        W, V = arrays['W'], arrays['V']
+        self.W = [list(W[k * self.J:(k + 1) * self.J]) for k in xrange(self.K)]
+        self.V = [list(V[j * self.I:(j + 1) * self.I]) for j in xrange(self.J)]
+        self.y = [0.0] * self.J
+        self.o = [0.0] * self.K
+
     def print_weights(self):
         """Print weights."""
         print('W:')
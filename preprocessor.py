@@ -0,0 +1,154 @@
+"""
+preprocessor.py.
+
+Holds the Preprocessor class.
+"""
+import json
+
+from all_exceptions import LogicError
+from attribute import NumericAttribute
+from attributes import Attributes
+from encoder import BinaryEncoder
+from example import CompactExample, Examples
+from stats import ColumnStats
+
+
+class Preprocessor(object):
+    """Standardizes numeric attributes and one-hot encodes nominal ones.
+
+    Fitted once on a training set, it keeps the mean and standard
+    deviation of every numeric attribute and the one-hot layout, then
+    transforms any DataSet, example or chunk of rows with the same
+    attributes without recomputing statistics.
+
+    Attributes
+    ----------
+        attributes (Attributes): attributes of the data it was fitted on
+        means (dict): attribute index -> mean of numeric attributes
+        stdevs (dict): attribute index -> stdev of numeric attributes
+        encoder (BinaryEncoder): one-hot layout of `attributes`
+        sparse (bool): transform examples into SparseExamples
+    """
+
+    FORMAT = 'bpp-preprocessor'
+    VERSION = 1
+
+    def __init__(self, sparse=False):
+        """Unfitted preprocessor, `sparse` picks sparse output rows."""
+        self.sparse = sparse
+        self.attributes = None
+        self.means = {}
+        self.stdevs = {}
+        self.encoder = None
+
+    @property
+    def is_fitted(self):
+        """Return True once fit has been called."""
+        return self.encoder is not None
+
+    def fit(self, dataset):
+        """Fit on the examples of `dataset`, returns self."""
+        return self._fit(dataset.attributes, dataset.examples.statistics())
+
+    def fit_chunks(self, attributes, chunks):
+        """Fit on blocks of rows, e.g. MffReader.chunks(), returns self."""
+        return self._fit(attributes, ColumnStats.from_chunks(chunks, attributes.size))
+
+    def _fit(self, attributes, stats):
+        self.attributes = attributes
+        self.means = {}
+        self.stdevs = {}
+        for i, attribute in enumerate(attributes):
+            if i != attributes.classindex and isinstance(attribute, NumericAttribute):
+                self.means[i] = stats.mean(i)
+                # a constant column is centered but not scaled
+                self.stdevs[i] = stats.stdev(i) or 1.0
+        self.encoder = BinaryEncoder(attributes)
+        return self
+
+    @property
+    def output_attributes(self):
+        """Return attributes of transformed data."""
+        return self.encoder.attributes
+
+    def _standardize(self, rows):
+        """Yield `rows` as lists with numeric values standardized."""
+        numeric = [(i, self.means[i], self.stdevs[i]) for i in sorted(self.means)]
+        for values in rows:
+            values = list(values)
+            for i, mean, stdev in numeric:
+                values[i] = (values[i] - mean) / stdev
+            yield values
+
+    def transform(self, data):
+        """Transform a DataSet, Examples, chunk of rows or single example.
+
+        DataSets come back as a new DataSet, Examples and chunks (lists of
+        rows) as a new MatrixExamples (SparseExamples if `sparse`), and a
+        single example as a CompactExample (a SparseExample if `sparse`).
+        The input is never modified.
+        """
+        if not self.is_fitted:
+            raise LogicError("Preprocessor.transform called before fit.")
+        self._check_schema(data)
+        if isinstance(data, Examples):
+            return self.encoder.encode_rows(self._standardize(data.rows()), self.sparse)
+        if isinstance(data, list) and (not data or not isinstance(data[0], (int, long, float))):
+            return self.encoder.encode_rows(self._standardize(data), self.sparse)
+        if hasattr(data, 'examples'):  # a DataSet
+            dataset = type(data)(attributes=self.output_attributes, name=data.name)
+            dataset.examples = self.transform(data.examples)
+            return dataset
+        if self.sparse:
+            return self.encoder.encode_rows(self._standardize([data]), True)[0]
+        values = next(self._standardize([data]))
+        return CompactExample(self.encoder.encode_row(values))
+
+    def _check_schema(self, data):
+        """Raise LogicError unless `data` has the attributes this was fitted on.
+
+        DataSets and Examples are compared by schema, rows by their length.
+        """
+        attributes = getattr(data, 'attributes', None)
+        if attributes is not None:
+            if str(attributes) != str(self.attributes):
+                raise LogicError("Data does not have the schema the Preprocessor was fitted on.")
+            return
+        if isinstance(data, list) and data and not isinstance(data[0], (int, long, float)):
+            data = data[0]  # a chunk, check its first row
+        size = len(list(data))
+        if size and size != self.attributes.size:
+            e = "Rows have %s values, the Preprocessor was fitted on %s attributes."
+            raise LogicError(e % (size, self.attributes.size))
+
+    def to_dict(self):
+        """Return a JSON serializable description of the fitted state."""
+        if not self.is_fitted:
+            raise LogicError("Cannot serialize an unfitted Preprocessor.")
+        return {'format': self.FORMAT, 'version': self.VERSION,
+                'schema': str(self.attributes), 'sparse': self.sparse,
+                'means': [[i, self.means[i]] for i in sorted(self.means)],
+                'stdevs': [[i, self.stdevs[i]] for i in sorted(self.stdevs)]}
+
+    @classmethod
+    def from_dict(cls, state):
+        """Return the Preprocessor described by `state` (see to_dict)."""
+        if state.get('format') != cls.FORMAT or state.get('version') != cls.VERSION:
+            raise LogicError("Not a version %s preprocessor." % cls.VERSION)
+        preprocessor = cls(sparse=state.get('sparse', False))
+        preprocessor.attributes = Attributes.from_string(str(state['schema']))
+        preprocessor.means = dict((i, v) for i, v in state['means'])
+        preprocessor.stdevs = dict((i, v) for i, v in state['stdevs'])
+        preprocessor.encoder = BinaryEncoder(preprocessor.attributes)
+        return preprocessor
+
+    def save(self, path):
+        """Write the fitted state to `path` as JSON."""
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path):
+        """Read a Preprocessor saved with `save`."""
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
@@ -0,0 +1,184 @@
+"""
+reader.py.
+
+Holds the MffReader class.
+"""
+import os
+from array import array
+from multiprocessing import Pool
+
+from all_exceptions import LogicError
+from attributes import Attributes
+from dataset import DataSet
+from example import Examples, MatrixExamples
+
+
+def _parse_range(task):
+    """Parse the lines in a byte range of an .mff file, runs in a worker.
+
+    Returns the packed arrays of a MatrixExamples when `matrix` is set,
+    otherwise a list of parsed rows.
+    """
+    path, attributes, start, end, matrix = task
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    if matrix:
+        examples = MatrixExamples(attributes)
+        for line in data.split("\n"):
+            if len(line) > 1:
+                examples.parse(line)
+        return examples.matrix.tostring(), examples.classes.tostring()
+    parser = Examples(attributes)
+    return [parser.parse_values(line) for line in data.split("\n") if len(line) > 1]
+
+
+class MffReader(object):
+    """Streaming reader for .mff files.
+
+    The `@dataset`/`@attribute` header is parsed once when the reader is
+    created. The `@examples` section is only read on demand, either all at
+    once with `read` or in fixed-size chunks with `chunks`, so a single pass
+    over a file never holds more than `chunk_size` rows.
+
+    Attributes
+    ----------
+        path (str): path of the .mff file
+        chunk_size (int): default number of rows per chunk
+        name (str): name of the dataset
+        attributes (Attributes): attributes parsed from the header
+        header (list): the `@dataset` and `@attribute` lines as written
+        offset (int): byte offset of the first line after `@examples`
+    """
+
+    def __init__(self, path, chunk_size=10000):
+        """Open `path` and parse its header."""
+        if not os.path.exists(path):
+            raise LogicError("%s does not exist!" % path)
+        self.path = path
+        self.chunk_size = chunk_size
+        self.name = None
+        self.attributes = Attributes()
+        self.header = []
+        self.offset = None
+        self._read_header()
+
+    def _read_header(self):
+        """Parse lines up to `@examples`, remembering where the body starts."""
+        with open(self.path) as f:
+            while True:
+                line = f.readline()
+                if not line:
+                    break
+                line = line.replace("\n", "")
+                if '@dataset' in line:
+                    self.name = line.split(" ")[1]
+                    self.header.append(line)
+                elif '@attribute' in line:
+                    self.attributes.parse(line)
+                    self.header.append(line)
+                elif '@example' in line:
+                    self.offset = f.tell()
+                    break
+
+    def _new_examples(self, matrix=False, compact=False):
+        if matrix:
+            return MatrixExamples(self.attributes)
+        return Examples(self.attributes, compact=compact)
+
+    def lines(self):
+        """Yield the non-empty lines of the `@examples` section."""
+        if self.offset is None:
+            return
+        with open(self.path) as f:
+            f.seek(self.offset)
+            for line in f:
+                line = line.replace("\n", "")
+                if len(line) > 1:
+                    yield line
+
+    def chunks(self, chunk_size=None, matrix=False):
+        """Yield the examples in blocks of at most `chunk_size` rows.
+
+        Args:
+            chunk_size (int): rows per block, defaults to self.chunk_size
+            matrix (bool): yield MatrixExamples blocks instead of lists of
+                parsed rows (each row a list of values).
+        """
+        chunk_size = chunk_size or self.chunk_size
+        parser = Examples(self.attributes)
+        chunk = self._new_examples(matrix) if matrix else []
+        for line in self.lines():
+            if matrix:
+                chunk.parse(line)
+            else:
+                chunk.append(parser.parse_values(line))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = self._new_examples(matrix) if matrix else []
+        if len(chunk):
+            yield chunk
+
+    def byte_ranges(self, n):
+        """Split the `@examples` section into about `n` ranges on line boundaries.
+
+        Returns a list of (start, end) byte offsets covering the section
+        in file order.
+        """
+        if self.offset is None:
+            return []
+        end = os.path.getsize(self.path)
+        step = max(1, (end - self.offset) // max(1, n))
+        bounds = [self.offset]
+        with open(self.path, 'rb') as f:
+            while bounds[-1] + step < end:
+                f.seek(bounds[-1] + step)
+                f.readline()
+                if f.tell() >= end:
+                    break
+                bounds.append(f.tell())
+        bounds.append(end)
+        return zip(bounds[:-1], bounds[1:])
+
+    def read(self, matrix=False, workers=1, compact=False):
+        """Read every example into a DataSet.
+
+        Args:
+            matrix (bool): store the examples in a MatrixExamples
+            compact (bool): store list examples as CompactExample rows
+            workers (int): parse with this many processes. The section is
+                split into byte ranges on line boundaries that are parsed
+                in a process pool and concatenated in file order.
+        """
+        if workers > 1:
+            examples = self._read_parallel(matrix, workers, compact)
+        else:
+            examples = self._new_examples(matrix, compact)
+            for line in self.lines():
+                examples.parse(line)
+        dataset = DataSet(name=self.name, attributes=self.attributes)
+        dataset.examples = examples
+        return dataset
+
+    def _read_parallel(self, matrix, workers, compact=False):
+        """Parse the byte ranges of the examples section in a process pool."""
+        tasks = [(self.path, self.attributes, start, end, matrix)
+                 for start, end in self.byte_ranges(workers * 4)]
+        examples = self._new_examples(matrix, compact)
+        pool = Pool(workers)
+        try:
+            if matrix:
+                values = array('d')
+                classes = array(examples.classes.typecode)
+                for block, labels in pool.imap(_parse_range, tasks):
+                    values.fromstring(block)
+                    classes.fromstring(labels)
+                examples = MatrixExamples.from_arrays(self.attributes, values, classes)
+            else:
+                for rows in pool.imap(_parse_range, tasks):
+                    for row in rows:
+                        examples.append(examples.make_example(row))
+        finally:
+            pool.close()
+            pool.join()
+        return examples
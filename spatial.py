@@ -0,0 +1,504 @@
+"""
+spatial.py.
+
+Spatial indexes for exact k nearest neighbor search.
+
+BruteForce, KDTree and VPTree identify rows of non-class values by their
+position and answer queries with the k smallest (distance, index) pairs,
+the same neighbors, in the same order, as sorting every training example
+by distance. LSHIndex answers the same queries approximately.
+
+Every index takes new rows with add() without being rebuilt. Removed rows
+are tombstones: their indices go in the `removed` set, which queries skip,
+and the indices of the other rows never change.
+"""
+import heapq
+import random
+from collections import defaultdict
+from itertools import count
+from math import floor, sqrt
+
+
+_INF = float('inf')
+_SLACK = 1e-9  # relative slack on triangle inequality bounds for rounding
+
+
+def distance(a, b, nominal):
+    """Distance between value lists `a` and `b` as in NearestNeighbor.euclidean_dist.
+
+    Numeric values add their squared difference, nominal ones (True in
+    `nominal`) add 1 when they differ.
+    """
+    dist = 0.0
+    for x, y, is_nominal in zip(a, b, nominal):
+        if is_nominal:
+            if x != y:
+                dist += 1
+        else:
+            dist += (x - y)**2
+    return sqrt(dist)
+
+
+def euclidean(a, b):
+    """Euclidean distance between value lists `a` and `b`."""
+    return sqrt(sum([(x - y)**2 for x, y in zip(a, b)]))
+
+
+class Neighbors(object):
+    """The k smallest (distance, index) pairs pushed so far.
+
+    Kept as a heap of (-distance, -index) so the worst pair is on top.
+    """
+
+    __slots__ = ('k', 'heap')
+
+    def __init__(self, k):
+        """Collect the `k` nearest."""
+        self.k = k
+        self.heap = []
+
+    @property
+    def bound(self):
+        """Return the distance a candidate must not exceed to be kept."""
+        if len(self.heap) < self.k:
+            return _INF
+        return -self.heap[0][0]
+
+    def push(self, dist, index):
+        """Offer the row `index` at distance `dist`."""
+        item = (-dist, -index)
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, item)
+        elif item > self.heap[0]:
+            heapq.heapreplace(self.heap, item)
+
+    def result(self):
+        """Return the (distance, index) pairs, nearest first."""
+        return sorted((-dist, -index) for dist, index in self.heap)
+
+
+class SearchIndex(object):
+    """Base of the indexes, holds the tombstones of removed rows.
+
+    Attributes
+    ----------
+        removed (set): indices of removed rows, may be shared with the owner
+    """
+
+    removed = frozenset()
+
+    def remove(self, index):
+        """Skip the row `index` in every later query."""
+        if not isinstance(self.removed, set):
+            self.removed = set()
+        self.removed.add(index)
+
+
+class BruteForce(SearchIndex):
+    """Exact search comparing the query with every row, column by column.
+
+    The training values are kept as one list per column, and the distance
+    from a query to every row is accumulated one column at a time with a
+    precomputed numeric/nominal mask, adding the columns of each row in
+    the same order as `distance`. The k nearest are picked with a heap
+    instead of sorting every distance.
+
+    Attributes
+    ----------
+        columns (list): one sequence (list or array) of values per column
+        nominal (list): True for nominal columns
+        size (int): number of rows
+    """
+
+    def __init__(self, columns, nominal):
+        """Search the rows whose values are `columns`, which are kept, not copied."""
+        self.columns = list(columns)
+        self.nominal = nominal
+        self.size = len(self.columns[0]) if self.columns else 0
+
+    def add(self, row):
+        """Append the value list `row`, returns its index."""
+        for column, value in zip(self.columns, row):
+            column.append(value)
+        self.size += 1
+        return self.size - 1
+
+    def distances(self, point):
+        """Return the distance from the value list `point` to every row."""
+        sums = [0.0] * self.size
+        for column, is_nominal, q in zip(self.columns, self.nominal, point):
+            if is_nominal:
+                sums = [s + (x != q) for s, x in zip(sums, column)]
+            else:
+                sums = [s + (x - q)**2 for s, x in zip(sums, column)]
+        return map(sqrt, sums)
+
+    def query(self, point, k):
+        """Return the `k` nearest (distance, index) pairs to the value list `point`."""
+        pairs = zip(self.distances(point), count())
+        if self.removed:
+            removed = self.removed
+            pairs = [pair for pair in pairs if pair[1] not in removed]
+        return heapq.nsmallest(k, pairs)
+
+
+class LSHIndex(SearchIndex):
+    """Approximate search over locality sensitive hash buckets.
+
+    Each of `tables` hash tables keys a row by `hashes` hash functions.
+    A function over the numeric columns is a random gaussian projection
+    cut into buckets `bucket_width` standard deviations wide (p-stable
+    LSH for the squared differences). A function over the nominal
+    columns is the value of one randomly picked column (bit sampling for
+    the mismatch count). Functions are drawn from the two kinds in
+    proportion to their number of columns.
+
+    Rows sharing a bucket with the query in any table are ranked by their
+    exact distance. More tables find more of the true neighbors for more
+    candidates to rank; with fewer than k candidates every row is ranked.
+
+    Attributes
+    ----------
+        rows (list): value lists, a row is identified by its position
+        nominal (list): True for nominal columns
+        functions (list): hash functions of each table, a column index for
+            nominal ones and a (weights, offset, width) tuple for projections
+        tables (list): dict of key -> row indices for each table
+    """
+
+    def __init__(self, rows, nominal, tables=10, hashes=4, bucket_width=1.0, seed=0):
+        """Hash `rows` into `tables` tables, `seed` draws the hash functions."""
+        self.rows = rows
+        self.nominal = nominal
+        self._numeric = [i for i, is_nominal in enumerate(nominal) if not is_nominal]
+        nominal_columns = [i for i, is_nominal in enumerate(nominal) if is_nominal]
+        share = len(self._numeric) / float(len(nominal) or 1)
+        rnd = random.Random(seed)
+        projected = [[row[i] for i in self._numeric] for row in rows]
+        self.functions = []
+        for _ in xrange(tables):
+            functions = []
+            for _ in xrange(hashes):
+                if self._numeric and (not nominal_columns or rnd.random() < share):
+                    weights = [rnd.gauss(0.0, 1.0) for _ in self._numeric]
+                    values = [sum([w * x for w, x in zip(weights, p)]) for p in projected]
+                    mean = sum(values) / (len(values) or 1)
+                    stdev = sqrt(sum((v - mean)**2 for v in values) / (len(values) or 1))
+                    width = bucket_width * stdev or 1.0
+                    functions.append((weights, rnd.uniform(0.0, width), width))
+                elif nominal_columns:
+                    functions.append(rnd.choice(nominal_columns))
+            self.functions.append(functions)
+        self.tables = [defaultdict(list) for _ in self.functions]
+        for i, row in enumerate(rows):
+            for key, table in zip(self._keys(row), self.tables):
+                table[key].append(i)
+
+    def add(self, row):
+        """Append the value list `row` to its bucket in every table, returns its index."""
+        index = len(self.rows)
+        self.rows.append(row)
+        for key, table in zip(self._keys(row), self.tables):
+            table[key].append(index)
+        return index
+
+    def _keys(self, point):
+        """Return the key of `point` in every table."""
+        projected = [point[i] for i in self._numeric]
+        keys = []
+        for functions in self.functions:
+            key = []
+            for function in functions:
+                if isinstance(function, tuple):
+                    weights, offset, width = function
+                    value = sum([w * x for w, x in zip(weights, projected)])
+                    key.append(int(floor((value + offset) / width)))
+                else:
+                    key.append(point[function])
+            keys.append(tuple(key))
+        return keys
+
+    def candidates(self, point):
+        """Return the set of rows sharing a bucket with `point` in some table."""
+        found = set()
+        for key, table in zip(self._keys(point), self.tables):
+            found.update(table.get(key, ()))
+        return found
+
+    def query(self, point, k):
+        """Return about the `k` nearest (distance, index) pairs to the value list `point`."""
+        found = self.candidates(point) - self.removed
+        if len(found) < k:
+            found = [i for i in xrange(len(self.rows)) if i not in self.removed]
+        rows, nominal = self.rows, self.nominal
+        return heapq.nsmallest(k, [(distance(point, rows[i], nominal), i) for i in found])
+
+
+class _Tree(SearchIndex):
+    """Base of KDTree and VPTree: bucket leaves, inserts and rebuilds.
+
+    Every node counts the rows below it. After an insert the highest node
+    on the insert path where one child holds more than ALPHA of its rows
+    is rebuilt from scratch (as in a scapegoat tree), so sorted or
+    otherwise skewed inserts cannot grow a spine: depth stays
+    logarithmic and inserts cost amortized O(log^2 n).
+    """
+
+    ALPHA = 0.7
+
+    def _grow(self, node):
+        """Split the leaf `node` and its new leaves until they are small."""
+        stack = [node]
+        while stack:
+            stack.extend(self._split(stack.pop()))
+
+    def _insert(self, index, path, leaf):
+        """Put row `index` in `leaf`, below the inner nodes of `path` (root first)."""
+        leaf.bucket.append(index)
+        leaf.size += 1
+        for node in path:
+            node.size += 1
+        limit = 4 * self.leaf_size  # small subtrees may be unbalanced
+        for node in path:
+            if node.size > limit and max(c.size for c in node.children()) > self.ALPHA * node.size:
+                self._rebuild(node)
+                return
+        if len(leaf.bucket) > (leaf.capacity or 2 * self.leaf_size) and not self._split(leaf):
+            leaf.capacity = 2 * len(leaf.bucket)  # identical rows, try again when doubled
+
+    def _rebuild(self, node):
+        """Rebuild the subtree below `node` from its rows."""
+        indices = []
+        stack = [node]
+        while stack:
+            below = stack.pop()
+            if below.bucket is None:
+                stack.extend(below.children())
+            else:
+                indices.extend(below.bucket)
+        node.reset(indices)
+        self._grow(node)
+
+    def depth(self):
+        """Return the number of levels below the root."""
+        deepest = 0
+        stack = [(self.root, 0)]
+        while stack:
+            node, depth = stack.pop()
+            deepest = max(deepest, depth)
+            if node.bucket is None:
+                stack.extend((child, depth + 1) for child in node.children())
+        return deepest
+
+
+class _KDNode(object):
+    """Node of a KDTree, leaves hold a bucket of row indices."""
+
+    __slots__ = ('dimension', 'split', 'left', 'right', 'bucket', 'capacity', 'size')
+
+    def __init__(self, bucket=None):
+        self.reset(bucket)
+
+    def reset(self, bucket):
+        """Make this node a leaf holding `bucket`."""
+        self.bucket = bucket
+        self.size = len(bucket)
+        self.capacity = None
+        self.dimension = None
+        self.split = None
+        self.left = None
+        self.right = None
+
+    def children(self):
+        """Return the two children of an inner node."""
+        return self.left, self.right
+
+
+class KDTree(_Tree):
+    """k-d tree over numeric rows, exact under euclidean distance.
+
+    Inner nodes split their rows at the median of the dimension with the
+    widest spread: rows <= split go left, rows >= split right. A subtree
+    is skipped when the gap from the query to the split is more than the
+    current k-th distance. Added rows go down to a leaf, which is split
+    when it holds twice `leaf_size` rows, and unbalanced subtrees are
+    rebuilt (see _Tree).
+
+    Attributes
+    ----------
+        rows (list): value lists, a row is identified by its position
+        leaf_size (int): most rows in a leaf bucket
+        root (_KDNode): root node
+    """
+
+    def __init__(self, rows, leaf_size=16):
+        """Index `rows`."""
+        self.rows = rows
+        self.leaf_size = leaf_size
+        self.root = _KDNode(bucket=range(len(rows)))
+        self._grow(self.root)
+
+    def _split(self, node):
+        """Split the leaf `node` if it holds too many rows, returns its new children."""
+        rows = self.rows
+        indices = node.bucket
+        if len(indices) <= self.leaf_size:
+            return []
+        width = len(rows[indices[0]])
+        spreads = []
+        for d in xrange(width):
+            column = [rows[i][d] for i in indices]
+            spreads.append((max(column) - min(column), -d))
+        spread, d = max(spreads)
+        if spread <= 0:  # identical rows stay in one bucket
+            return []
+        d = -d
+        indices = sorted(indices, key=lambda i: rows[i][d])
+        mid = len(indices) // 2
+        node.bucket = None
+        node.dimension = d
+        node.split = rows[indices[mid - 1]][d]
+        node.left = _KDNode(bucket=indices[:mid])
+        node.right = _KDNode(bucket=indices[mid:])
+        return [node.left, node.right]
+
+    def add(self, row):
+        """Insert the value list `row`, returns its index."""
+        index = len(self.rows)
+        self.rows.append(row)
+        path = []
+        node = self.root
+        while node.bucket is None:
+            path.append(node)
+            node = node.left if row[node.dimension] <= node.split else node.right
+        self._insert(index, path, node)
+        return index
+
+    def query(self, point, k):
+        """Return the `k` nearest (distance, index) pairs to the value list `point`."""
+        neighbors = Neighbors(k)
+        rows, removed = self.rows, self.removed
+        stack = [(self.root, 0.0)]
+        while stack:
+            node, gap = stack.pop()
+            if gap > neighbors.bound:
+                continue
+            while node.bucket is None:
+                diff = point[node.dimension] - node.split
+                if diff <= 0:
+                    near, far = node.left, node.right
+                else:
+                    near, far = node.right, node.left
+                stack.append((far, sqrt(diff * diff)))
+                node = near
+            for i in node.bucket:
+                if i not in removed:
+                    neighbors.push(euclidean(point, rows[i]), i)
+        return neighbors.result()
+
+
+class _VPNode(object):
+    """Node of a VPTree, leaves hold a bucket of row indices."""
+
+    __slots__ = ('vantage', 'radius', 'inside', 'outside', 'bucket', 'capacity', 'size')
+
+    def __init__(self, bucket=None):
+        self.reset(bucket)
+
+    def reset(self, bucket):
+        """Make this node a leaf holding `bucket`."""
+        self.bucket = bucket
+        self.size = len(bucket)
+        self.capacity = None
+        self.vantage = None
+        self.radius = None
+        self.inside = None
+        self.outside = None
+
+    def children(self):
+        """Return the two children of an inner node."""
+        return self.inside, self.outside
+
+
+class VPTree(_Tree):
+    """Vantage point tree, exact under the mixed numeric/nominal `distance`.
+
+    Inner nodes split their rows at the median distance to a vantage row:
+    rows within the radius go inside, the rest outside. The triangle
+    inequality bounds the distance from the query to either side. Added
+    rows go down to a leaf, which is split when it holds twice
+    `leaf_size` rows, and unbalanced subtrees are rebuilt (see _Tree).
+
+    Attributes
+    ----------
+        rows (list): value lists, a row is identified by its position
+        nominal (list): True for nominal columns
+        leaf_size (int): most rows in a leaf bucket
+        root (_VPNode): root node
+    """
+
+    def __init__(self, rows, nominal, leaf_size=16, seed=0):
+        """Index `rows`, `seed` picks the vantage rows."""
+        self.rows = rows
+        self.nominal = nominal
+        self.leaf_size = leaf_size
+        self._random = random.Random(seed)
+        self.root = _VPNode(bucket=range(len(rows)))
+        self._grow(self.root)
+
+    def _split(self, node):
+        """Split the leaf `node` if it holds too many rows, returns its new children."""
+        rows, nominal = self.rows, self.nominal
+        indices = node.bucket
+        if len(indices) <= self.leaf_size:
+            return []
+        vantage = indices[self._random.randrange(len(indices))]
+        point = rows[vantage]
+        dists = sorted((distance(point, rows[i], nominal), i) for i in indices)
+        if dists[-1][0] <= 0:  # identical rows stay in one bucket
+            return []
+        mid = len(dists) // 2
+        node.bucket = None
+        node.vantage = vantage
+        node.radius = dists[mid - 1][0]
+        node.inside = _VPNode(bucket=[i for _, i in dists[:mid]])
+        node.outside = _VPNode(bucket=[i for _, i in dists[mid:]])
+        return [node.inside, node.outside]
+
+    def add(self, row):
+        """Insert the value list `row`, returns its index."""
+        index = len(self.rows)
+        self.rows.append(row)
+        path = []
+        node = self.root
+        while node.bucket is None:
+            path.append(node)
+            if distance(row, self.rows[node.vantage], self.nominal) <= node.radius:
+                node = node.inside
+            else:
+                node = node.outside
+        self._insert(index, path, node)
+        return index
+
+    def query(self, point, k):
+        """Return the `k` nearest (distance, index) pairs to the value list `point`."""
+        neighbors = Neighbors(k)
+        rows, nominal, removed = self.rows, self.nominal, self.removed
+        stack = [(self.root, 0.0)]
+        while stack:
+            node, gap = stack.pop()
+            bound = neighbors.bound
+            if gap - bound > _SLACK * (1.0 + bound):
+                continue
+            while node.bucket is None:
+                dist = distance(point, rows[node.vantage], nominal)
+                if dist <= node.radius:
+                    stack.append((node.outside, node.radius - dist))
+                    node = node.inside
+                else:
+                    stack.append((node.inside, dist - node.radius))
+                    node = node.outside
+            for i in node.bucket:
+                if i not in removed:
+                    neighbors.push(distance(point, rows[i], nominal), i)
+        return neighbors.result()
@@ -0,0 +1,102 @@
+"""
+stats.py.
+
+Holds the ColumnStats class.
+"""
+import math
+
+
+class ColumnStats(object):
+    """Count, mean, variance, min and max of every column in one pass.
+
+    Means and variances are updated with Welford's method, so they stay
+    accurate on long columns. Two ColumnStats over different rows can be
+    merged, which lets chunks of a streamed or parallel-parsed file be
+    summarized separately.
+
+    Attributes
+    ----------
+        count (int): number of rows seen
+        means (list): mean of each column
+        m2 (list): sum of squared differences from the mean of each column
+        minimums (list): smallest value of each column
+        maximums (list): largest value of each column
+    """
+
+    def __init__(self, width):
+        """Empty statistics for `width` columns."""
+        self.count = 0
+        self.means = [0.0] * width
+        self.m2 = [0.0] * width
+        self.minimums = [float('inf')] * width
+        self.maximums = [float('-inf')] * width
+
+    @classmethod
+    def from_rows(cls, rows, width):
+        """Return statistics of an iterable of rows of `width` values."""
+        stats = cls(width)
+        for row in rows:
+            stats.update(row)
+        return stats
+
+    @classmethod
+    def from_chunks(cls, chunks, width):
+        """Return statistics of blocks of rows, e.g. MffReader.chunks()."""
+        stats = cls(width)
+        for chunk in chunks:
+            stats.merge(cls.from_rows(chunk, width))
+        return stats
+
+    @property
+    def width(self):
+        """Return number of columns."""
+        return len(self.means)
+
+    def update(self, row):
+        """Add one row of values."""
+        self.count += 1
+        n = float(self.count)
+        means, m2 = self.means, self.m2
+        minimums, maximums = self.minimums, self.maximums
+        for i, v in enumerate(row):
+            delta = v - means[i]
+            means[i] += delta / n
+            m2[i] += delta * (v - means[i])
+            if v < minimums[i]:
+                minimums[i] = v
+            if v > maximums[i]:
+                maximums[i] = v
+
+    def merge(self, other):
+        """Add the rows summarized by `other`."""
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count = other.count
+            self.means = list(other.means)
+            self.m2 = list(other.m2)
+            self.minimums = list(other.minimums)
+            self.maximums = list(other.maximums)
+            return self
+        n_a, n_b = float(self.count), float(other.count)
+        n = n_a + n_b
+        for i in xrange(self.width):
+            delta = other.means[i] - self.means[i]
+            self.means[i] += delta * n_b / n
+            self.m2[i] += other.m2[i] + delta * delta * n_a * n_b / n
+            self.minimums[i] = min(self.minimums[i], other.minimums[i])
+            self.maximums[i] = max(self.maximums[i], other.maximums[i])
+        self.count += other.count
+        return self
+
+    def mean(self, i):
+        """Return mean of column `i`."""
+        return self.means[i]
+
+    def variance(self, i):
+        """Return population variance of column `i`."""
+        return self.m2[i] / self.count
+
+    def stdev(self, i):
+        """Return population standard deviation of column `i`."""
+        return math.sqrt(self.variance(i))
@@ -0,0 +1,34 @@
+"""Attribute tests."""
+
+import unittest
+
+from all_exceptions import LogicError
+from attribute import NominalAttribute
+
+
+class TestNominalAttribute(unittest.TestCase):
+    """Unittest of NominalAttribute."""
+
+    def setUp(self):
+        """Build a small nominal attribute."""
+        self.attribute = NominalAttribute(name='color')
+        for value in ['red', 'green', 'blue', 'green']:
+            self.attribute.add_value(value)
+
+    def test_index(self):  # noqa
+        self.assertEqual(self.attribute.domain, ['red', 'green', 'blue'])
+        self.assertEqual(self.attribute.index('blue'), 2)
+        self.assertTrue('green' in self.attribute)
+
+    def test_unknown_value(self):  # noqa
+        with self.assertRaises(LogicError):
+            self.attribute.index('purple')
+
+    def test_domain_assignment(self):  # noqa
+        self.attribute.domain = [0.0, 1.0]
+        self.assertEqual(self.attribute.index(1.0), 1)
+        self.assertFalse('red' in self.attribute)
+
+
+if __name__ == '__main__':
+    unittest.main()  # noqa
@@ -0,0 +1,94 @@
+"""Compiled .mff cache tests."""
+
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+import cache
+from all_exceptions import LogicError
+from traintestsets import TrainTestSets
+
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test_data')
+
+
+class TestCache(unittest.TestCase):
+    """Unittest of the compiled binary cache."""
+
+    def setUp(self):
+        """Copy soybean into a scratch directory."""
+        self.tmp = tempfile.mkdtemp()
+        self.source = os.path.join(self.tmp, 'soybean.mff')
+        shutil.copy(os.path.join(DATA, 'soybean.mff'), self.source)
+        self.parsed = TrainTestSets(train_path=self.source).train
+
+    def tearDown(self):  # noqa
+        shutil.rmtree(self.tmp)
+
+    def test_round_trip(self):  # noqa
+        dataset = cache.load(self.source)
+        self.assertTrue(os.path.exists(self.source + 'c'))
+        compiled = cache.read(self.source + 'c')
+        self.assertEqual(compiled.name, self.parsed.name)
+        self.assertEqual(str(compiled), str(self.parsed))
+        self.assertEqual(str(dataset), str(self.parsed))
+
+    def test_schema_lines(self):  # noqa
+        cache.load(self.source)
+        with open(self.source + 'c', 'rb') as f:
+            schema = cache.CompiledHeader.read(f).schema
+        with open(self.source) as f:
+            lines = [line.rstrip("\n") for line in f
+                     if '@dataset' in line or '@attribute' in line]
+        self.assertEqual(schema.split("\n"), lines)
+
+    def test_list_examples(self):  # noqa
+        cache.load(self.source)
+        dataset = TrainTestSets(train_path=self.source, use_cache=True).train
+        self.assertEqual([e.values for e in dataset.examples],
+                         [e.values for e in self.parsed.examples])
+
+    def test_stale(self):  # noqa
+        target = cache.cache_path(self.source, os.path.join(self.tmp, 'cache'))
+        cache.load(self.source, cache_dir=os.path.join(self.tmp, 'cache'))
+        with open(target, 'rb') as f:
+            self.assertTrue(cache.CompiledHeader.read(f).is_fresh(self.source, True))
+        with open(self.source, 'a') as f:
+            f.write("\n")
+        with open(target, 'rb') as f:
+            self.assertFalse(cache.CompiledHeader.read(f).is_fresh(self.source))
+
+    def test_mapped(self):  # noqa
+        dataset = cache.load(self.source, mapped=True)
+        examples = dataset.examples
+        self.assertTrue(isinstance(examples.matrix, cache.MappedArray))
+        self.assertEqual(str(dataset), str(self.parsed))
+        self.assertEqual(examples[-1].values, self.parsed.examples[-1].values)
+        self.assertEqual(examples.mean(3), self.parsed.examples.mean(3))
+        with self.assertRaises(LogicError):
+            examples[0][0] = 1.0
+
+    def test_remap(self):  # noqa
+        before = cache.load(self.source, mapped=True)
+        target = os.path.abspath(self.source + 'c')
+        old = cache._maps[target][1]
+        with open(self.source, 'a') as f:
+            f.write("\n")
+        after = cache.load(self.source, mapped=True)
+        self.assertTrue(cache._maps[target][1] is not old)
+        self.assertEqual(str(after), str(self.parsed))
+        # datasets loaded before the recompile still read their old map
+        self.assertEqual(before.examples[0].values, self.parsed.examples[0].values)
+        self.assertEqual(str(before), str(self.parsed))
+
+    def test_mapped_pickle(self):  # noqa
+        examples = cache.load(self.source, mapped=True).examples
+        data = pickle.dumps(examples.matrix, 2)
+        self.assertTrue(len(data) < 200)
+        self.assertEqual(pickle.loads(data)[:].tolist(), examples.matrix[:].tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()  # noqa
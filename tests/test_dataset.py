@@ -0,0 +1,99 @@
+"""DataSet tests."""
+
+import os
+from math import log
+import shutil
+import tempfile
+import unittest
+
+from reader import MffReader
+from traintestsets import TrainTestSets
+
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test_data')
+
+
+class TestDataSetWrite(unittest.TestCase):
+    """Unittest of DataSet serialization."""
+
+    def setUp(self):
+        """Load bikes."""
+        self.tmp = tempfile.mkdtemp()
+        self.dataset = TrainTestSets(train_path=os.path.join(DATA, 'bikes.mff')).train
+
+    def tearDown(self):  # noqa
+        shutil.rmtree(self.tmp)
+
+    def test_write_path(self):  # noqa
+        path = os.path.join(self.tmp, 'bikes.mff')
+        self.dataset.write(path)
+        with open(path) as f:
+            self.assertEqual(f.read(), str(self.dataset))
+        self.assertEqual(str(MffReader(path).read()), str(self.dataset))
+
+    def test_write_matrix(self):  # noqa
+        path = os.path.join(self.tmp, 'bikes.mff')
+        with open(path, 'w') as f:
+            MffReader(os.path.join(DATA, 'bikes.mff')).read(matrix=True).write(f)
+        with open(path) as f:
+            self.assertEqual(f.read(), str(self.dataset))
+
+
+class TestBinaryEncoding(unittest.TestCase):
+    """Unittest of one-hot encoding."""
+
+    def setUp(self):
+        """Load bikes."""
+        self.dataset = TrainTestSets(train_path=os.path.join(DATA, 'bikes.mff')).train
+
+    def test_layout(self):  # noqa
+        binary = self.dataset.to_binary()
+        names = [a.name for a in binary.attributes]
+        self.assertEqual(names, ['make0', 'make1', 'make2', 'make3', 'make4',
+                                 'tires', 'bars', 'bottles', 'weight', 'type'])
+        self.assertEqual(binary.attributes[3].value, 'nishiki')
+
+    def test_rows(self):  # noqa
+        before = str(self.dataset)
+        binary = self.dataset.to_binary()
+        self.assertEqual(str(self.dataset), before)
+        for original, encoded in zip(self.dataset.examples, binary.examples):
+            make = [0.0] * 5
+            make[original[0]] = 1.0
+            self.assertEqual(encoded.values, make + original.values[1:])
+
+    def test_normalize(self):  # noqa
+        self.dataset.normalize_attributes()
+        self.assertEqual(self.dataset.attributes_size, 10)
+        self.assertAlmostEqual(self.dataset.examples.mean(8), 0.0)
+        self.assertAlmostEqual(self.dataset.examples.stdev(8), 1.0)
+
+
+class TestInfoGain(unittest.TestCase):
+    """Unittest of contingency table information gain."""
+
+    def setUp(self):
+        """Load lenses."""
+        path = os.path.join(os.path.dirname(DATA), 'lenses.mff')
+        self.dataset = TrainTestSets(train_path=path).train
+
+    def test_best_split(self):  # noqa
+        # tear-prod-rate is the classic first split of the lenses data
+        self.assertEqual(self.dataset.get_best_split_attribute(), 3)
+
+    def test_gain(self):  # noqa
+        def h(*counts):
+            n = float(sum(counts))
+            return -sum(c / n * log(c / n, 2) for c in counts if c)
+        # 24 examples (5 soft, 4 hard, 15 none), reduced -> 12 none
+        expected = h(5, 4, 15) - 0.5 * h(12) - 0.5 * h(5, 4, 3)
+        self.assertAlmostEqual(self.dataset.info_gain(3), expected)
+
+    def test_gain_of_examples(self):  # noqa
+        reduced = [e for e in self.dataset.examples if e[3] == 0]
+        self.assertEqual(self.dataset.info_gain(0, reduced), 0.0)
+        self.assertEqual(self.dataset.entropy(4, reduced), 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()  # noqa
@@ -0,0 +1,217 @@
+"""DecisionTree tests."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from dataset import DataSet
+from DT import CompiledTree, DecisionTree, Node, size
+from traintestsets import TrainTestSets
+
+
+TESTS = os.path.dirname(os.path.abspath(__file__))
+DATA = os.path.join(TESTS, 'test_data')
+
+
+def accuracy(tree, dataset):
+    """Return the share of `dataset` that `tree` classifies correctly."""
+    correct = sum(1 for e in dataset.examples if tree.classify(e) == e[-1])
+    return correct / float(dataset.examples_size)
+
+
+def signature(node):
+    """Return the structure of the tree below `node` as nested tuples."""
+    return (node.attribute, node.attribute_val, node.classlabel, node.is_leaf,
+            tuple(signature(child) for child in node.children))
+
+
+class TestDecisionTree(unittest.TestCase):
+    """Unittest of the ID3 decision tree."""
+
+    def test_lenses(self):  # noqa
+        dataset = TrainTestSets(train_path=os.path.join(TESTS, 'lenses.mff')).train
+        tree = DecisionTree(dataset)
+        tree.train()
+        self.assertEqual(tree.root.attribute, 3)
+        self.assertEqual(accuracy(tree, dataset), 1.0)
+
+    def test_votes(self):  # noqa
+        path = os.path.join(DATA, 'votes.mff')
+        dataset = TrainTestSets(train_path=path).train
+        tree = DecisionTree()
+        tree.train(dataset)
+        self.assertTrue(accuracy(tree, dataset) > 0.95)
+        matrix = TrainTestSets(train_path=path, matrix=True).train
+        other = DecisionTree(matrix)
+        other.train()
+        self.assertEqual([tree.classify(e) for e in dataset.examples],
+                         [other.classify(e) for e in matrix.examples])
+
+    def test_parallel(self):  # noqa
+        dataset = TrainTestSets(train_path=os.path.join(DATA, 'soybean.mff')).train
+        serial = DecisionTree(dataset)
+        serial.train()
+        parallel = DecisionTree(dataset, n_jobs=2)
+        parallel.train()
+        self.assertEqual(signature(parallel.root), signature(serial.root))
+
+
+def depth(node):
+    """Return the number of levels below `node`."""
+    return 1 + max(depth(child) for child in node.children) if node.children else 0
+
+
+class TestLimits(unittest.TestCase):
+    """Unittest of the stopping rules and pruning."""
+
+    def setUp(self):  # noqa
+        self.dataset = TrainTestSets(train_path=os.path.join(DATA, 'soybean.mff')).train
+
+    def test_max_depth(self):  # noqa
+        full = DecisionTree(self.dataset)
+        full.train()
+        for max_depth in (0, 1, 3):
+            tree = DecisionTree(self.dataset, max_depth=max_depth)
+            tree.train()
+            self.assertTrue(depth(tree.root) <= max_depth)
+            self.assertTrue(size(tree.root) < size(full.root))
+        parallel = DecisionTree(self.dataset, n_jobs=2, max_depth=3)
+        parallel.train()
+        self.assertEqual(signature(parallel.root), signature(tree.root))
+
+    def test_min_samples_split(self):  # noqa
+        tree = DecisionTree(self.dataset, min_samples_split=self.dataset.examples_size + 1)
+        tree.train()
+        self.assertTrue(tree.root.is_leaf)
+        tree = DecisionTree(self.dataset, min_samples_split=50)
+        tree.train()
+        full = DecisionTree(self.dataset)
+        full.train()
+        self.assertTrue(0 < size(tree.root) < size(full.root))
+
+    def test_min_gain(self):  # noqa
+        tree = DecisionTree(self.dataset, min_gain=10.0)
+        tree.train()
+        self.assertTrue(tree.root.is_leaf)
+
+    def test_prune(self):  # noqa
+        examples = list(self.dataset.examples)
+        dataset = DataSet(self.dataset.attributes, examples[::2])
+        holdout = DataSet(self.dataset.attributes, examples[1::2])
+        tree = DecisionTree(dataset)
+        tree.train()
+        before, errors = size(tree.root), 1.0 - accuracy(tree, holdout)
+        removed = tree.prune(holdout)
+        self.assertTrue(removed > 0)
+        self.assertEqual(size(tree.root), before - removed)
+        self.assertTrue(1.0 - accuracy(tree, holdout) <= errors)
+        self.assertEqual(tree.classify_batch(holdout), [tree.classify(e) for e in holdout.examples])
+
+
+class TestCompiledTree(unittest.TestCase):
+    """Unittest of the flattened tree."""
+
+    def setUp(self):  # noqa
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):  # noqa
+        shutil.rmtree(self.tmp)
+
+    def check(self, path):
+        """Compiled, matrix and reloaded trees must agree with the recursive tree."""
+        dataset = TrainTestSets(train_path=path).train
+        tree = DecisionTree(dataset)
+        tree.train()
+        expected = [tree.classify(e) for e in dataset.examples]
+        self.assertEqual(tree.classify_batch(dataset), expected)
+        matrix = TrainTestSets(train_path=path, matrix=True).train
+        self.assertEqual(tree.classify_batch(matrix), expected)
+        model = os.path.join(self.tmp, 'tree.bin')
+        tree.compiled.save(model)
+        loaded = CompiledTree.load(model)
+        self.assertEqual(loaded.size, tree.compiled.size)
+        self.assertEqual(loaded.classify_batch(matrix), expected)
+
+    def test_votes(self):  # noqa
+        self.check(os.path.join(DATA, 'votes.mff'))
+
+    def test_bikes(self):  # noqa
+        self.check(os.path.join(DATA, 'bikes.mff'))
+
+    def test_unseen_value(self):  # noqa
+        dataset = TrainTestSets(train_path=os.path.join(DATA, 'votes.mff')).train
+        tree = DecisionTree(dataset)
+        tree.train()
+        values = list(dataset.examples[0].values)
+        values[tree.root.attribute] = 99
+        self.assertEqual(tree.classify(values), tree.root.classlabel)
+        self.assertEqual(tree.compile().classify_values(values), tree.root.classlabel)
+
+    def test_deep_tree(self):  # noqa
+        root = node = Node(attribute=0, classlabel=0, threshold=0.5)
+        for level in xrange(1, 2000):
+            low = Node(classlabel=level % 2, is_leaf=True)
+            high = Node(attribute=0, classlabel=0, threshold=level + 0.5)
+            low.attribute_val, high.attribute_val = 0, 1
+            node.append(low)
+            node.append(high)
+            node = high
+        node.make_leaf()
+        compiled = CompiledTree.from_node(root)
+        self.assertEqual(compiled.depth(), 1999)
+        self.assertFalse(compiled._router())  # too deep for generated code, walks the arrays
+        self.assertEqual(compiled.classify_values([1500.0, 0]), 1)  # low branch of 1500.5
+        tree = DecisionTree()
+        tree.root = root
+        self.assertEqual(tree.classify([1500.0, 0]), 1)
+        self.assertEqual(tree.classify([5000.0, 0]), node.classlabel)
+
+
+class TestNumericSplits(unittest.TestCase):
+    """Unittest of threshold splits on numeric attributes."""
+
+    def setUp(self):
+        """Write a small numeric dataset."""
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'numeric.mff')
+        rows = [(6.0, 'a', 'hi'), (1.0, 'b', 'lo'), (3.0, 'a', 'lo'), (5.5, 'b', 'hi'),
+                (2.0, 'b', 'lo'), (4.0, 'a', 'hi'), (3.0, 'b', 'lo'), (7.0, 'b', 'mid'),
+                (8.0, 'b', 'mid')]
+        with open(self.path, 'w') as f:
+            f.write("@dataset numeric\n\n@attribute x numeric\n@attribute y a b\n")
+            f.write("@attribute class lo hi mid\n\n@examples\n\n")
+            for row in rows:
+                f.write("%s %s %s\n" % row)
+        self.dataset = TrainTestSets(train_path=self.path).train
+
+    def tearDown(self):  # noqa
+        shutil.rmtree(self.tmp)
+
+    def test_thresholds(self):  # noqa
+        tree = DecisionTree(self.dataset)
+        tree.train()
+        self.assertEqual(tree.root.attribute, 0)
+        self.assertEqual(accuracy(tree, self.dataset), 1.0)
+        thresholds = []
+        stack = [tree.root]
+        while stack:
+            node = stack.pop()
+            if node.threshold is not None:
+                thresholds.append(node.threshold)
+            stack.extend(node.children)
+        self.assertEqual(sorted(thresholds), [3.5, 6.5])
+        compiled = tree.compile()
+        self.assertTrue('<= 3.5:' in compiled.source())
+        self.assertEqual(compiled.classify_batch(self.dataset),
+                         [tree.classify(e) for e in self.dataset.examples])
+
+    def test_bikes(self):  # noqa
+        dataset = TrainTestSets(train_path=os.path.join(DATA, 'bikes.mff')).train
+        tree = DecisionTree(dataset)
+        tree.train()
+        self.assertEqual(accuracy(tree, dataset), 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()  # noqa
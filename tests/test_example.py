@@ -0,0 +1,108 @@
+"""Examples storage tests."""
+
+import os
+import unittest
+
+from all_exceptions import LogicError
+from traintestsets import TrainTestSets
+from example import CompactExample, MatrixExamples
+
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test_data')
+
+
+class TestMatrixExamples(unittest.TestCase):
+    """Unittest of the array backed Examples."""
+
+    def setUp(self):
+        """Load bikes with both storage backends."""
+        path = os.path.join(DATA, 'bikes.mff')
+        self.lists = TrainTestSets(train_path=path).train
+        self.matrix = TrainTestSets(train_path=path, matrix=True).train
+
+    def test_backend(self):  # noqa
+        self.assertTrue(isinstance(self.matrix.examples, MatrixExamples))
+        self.assertEqual(self.matrix.examples.size, self.lists.examples.size)
+        self.assertEqual(len(self.matrix.examples.matrix),
+                         self.matrix.examples.size * (self.matrix.attributes_size - 1))
+
+    def test_rows_match(self):  # noqa
+        for a, b in zip(self.lists.examples, self.matrix.examples):
+            self.assertEqual(a.values, b.values)
+            self.assertEqual(a[-1], b[-1])
+            self.assertEqual(a.size, b.size)
+
+    def test_column_stats(self):  # noqa
+        for i in xrange(self.lists.attributes_size):
+            self.assertEqual(list(self.lists.examples.column(i)),
+                             list(self.matrix.examples.column(i)))
+            self.assertAlmostEqual(self.lists.examples.mean(i), self.matrix.examples.mean(i))
+            self.assertAlmostEqual(self.lists.examples.stdev(i), self.matrix.examples.stdev(i))
+
+    def test_view_writes_through(self):  # noqa
+        examples = self.matrix.examples
+        examples[1][4] = 1.5
+        self.assertEqual(examples.matrix[1 * examples.width + 4], 1.5)
+        self.assertEqual(examples[1].values[4], 1.5)
+
+    def test_str(self):  # noqa
+        self.assertEqual(str(self.lists), str(self.matrix))
+
+    def test_parse_width(self):  # noqa
+        examples = MatrixExamples(self.matrix.attributes)
+        self.assertRaises(LogicError, examples.parse, ' '.join(['1'] * 3))
+        self.assertEqual(examples.size, 0)
+        self.assertEqual(len(examples.matrix), 0)
+
+    def test_assign_own_views(self):  # noqa
+        expected = [e.values for e in self.matrix.examples]
+        self.matrix.examples.examples = self.matrix.examples.examples
+        self.assertEqual([e.values for e in self.matrix.examples], expected)
+
+    def test_nominal_to_linear(self):  # noqa
+        path = os.path.join(DATA, 'soybean.mff')
+        lists = TrainTestSets(train_path=path).train
+        matrix = TrainTestSets(train_path=path, matrix=True).train
+        lists.nominal_to_linear()
+        matrix.nominal_to_linear()
+        for a, b in zip(lists.examples, matrix.examples):
+            for x, y in zip(a.values, b.values):
+                self.assertAlmostEqual(x, y)
+
+
+class TestCompactExample(unittest.TestCase):
+    """Unittest of the slotted array Example."""
+
+    def test_rows_match(self):  # noqa
+        path = os.path.join(DATA, 'soybean.mff')
+        lists = TrainTestSets(train_path=path).train
+        compact = TrainTestSets(train_path=path, compact=True).train
+        self.assertTrue(isinstance(compact.examples[0], CompactExample))
+        self.assertFalse(hasattr(compact.examples[0], '__dict__'))
+        for a, b in zip(lists.examples, compact.examples):
+            self.assertEqual(a.values, list(b.values))
+        self.assertEqual(str(lists), str(compact))
+
+    def test_values(self):  # noqa
+        example = CompactExample([1, 2.5])
+        example.append(3)
+        example[0] = 4
+        self.assertEqual(list(example), [4.0, 2.5, 3.0])
+        self.assertEqual(example.size, 3)
+        self.assertEqual(example.values[:2].tolist(), [4.0, 2.5])
+
+    def test_small_integers(self):  # noqa
+        path = os.path.join(DATA, 'soybean.mff')
+        compact = TrainTestSets(train_path=path, compact=True).train
+        example = compact.examples[0]
+        self.assertEqual(example.values.typecode, 'b')
+        values = list(example)
+        example[1] = 0.5  # widens the row to doubles
+        self.assertEqual(example.values.typecode, 'd')
+        self.assertEqual(list(example), values[:1] + [0.5] + values[2:])
+        bikes = TrainTestSets(train_path=os.path.join(DATA, 'bikes.mff'), compact=True).train
+        self.assertEqual(bikes.examples[0].values.typecode, 'd')
+
+
+if __name__ == '__main__':
+    unittest.main()  # noqa
@@ -0,0 +1,210 @@
+"""NearestNeighbor tests."""
+
+import os
+import random
+import sys
+import unittest
+from cStringIO import StringIO
+from operator import itemgetter
+
+from all_exceptions import LogicError
+from dataset import DataSet
+from evaluator import Evaluator
+from kNN import NearestNeighbor
+from spatial import KDTree, LSHIndex, VPTree, distance
+from traintestsets import TrainTestSets
+
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test_data')
+
+
+def scan(classifier, example):
+    """Class values of the k nearest to `example` by sorting every euclidean_dist."""
+    examples = classifier.train_examples
+    dists = [(examples.get_class_value_at(i), classifier.euclidean_dist(example, e, example.size))
+             for i, e in enumerate(examples)]
+    dists.sort(key=itemgetter(1))
+    return [label for label, _ in dists[:classifier.k]]
+
+
+class TestBruteForce(unittest.TestCase):
+    """Unittest of the column-wise brute force search."""
+
+    def test_scan(self):  # noqa
+        for name, matrix in (('soybean.mff', False), ('votes.mff', True)):
+            dataset = TrainTestSets(train_path=os.path.join(DATA, name), matrix=matrix).train
+            classifier = NearestNeighbor(dataset, k=5)
+            classifier.train()
+            queries = list(dataset.examples)[::25]
+            self.assertEqual([classifier.find_neighbor(e) for e in queries],
+                             [scan(classifier, e) for e in queries])
+
+    def test_classify_batch(self):  # noqa
+        dataset = TrainTestSets(train_path=os.path.join(DATA, 'votes.mff')).train
+        classifier = NearestNeighbor(dataset, k=3)
+        self.assertEqual(classifier.classify_batch(dataset),
+                         [classifier.classify(example=e) for e in dataset.examples])
+        neighbors = classifier.kneighbors(dataset, k=1)
+        self.assertEqual([distance for (distance, _), in neighbors], [0.0] * len(neighbors))
+
+    def test_parallel(self):  # noqa
+        for name, index in (('votes.mff', None), ('iris-binary.mff', 'vptree')):
+            dataset = TrainTestSets(train_path=os.path.join(DATA, name), matrix=True).train
+            classifier = NearestNeighbor(dataset, k=3, index=index)
+            classifier.train()
+            classifier.remove_examples([0, 5])
+            self.assertEqual(classifier.classify_batch(dataset, n_jobs=3),
+                             classifier.classify_batch(dataset))
+
+
+class TestVote(unittest.TestCase):
+    """Unittest of the majority vote of the k nearest neighbors."""
+
+    def test_find_response(self):  # noqa
+        classifier = NearestNeighbor()
+        self.assertEqual(classifier.find_response([2, 0, 0]), 0)
+        self.assertEqual(classifier.find_response([0, 2, 2, 1]), 2)
+        self.assertEqual(classifier.find_response([1, 2]), 1)  # tie, nearest wins
+        self.assertEqual(classifier.find_response([2, 1, 1, 2]), 2)
+
+    def test_classify(self):  # noqa
+        dataset = TrainTestSets(train_path=os.path.join(DATA, 'soybean.mff')).train
+        classifier = NearestNeighbor(dataset, k=5)
+        classifier.train()
+        for e in list(dataset.examples)[::20]:
+            labels = scan(classifier, e)
+            expected = max(labels, key=lambda l: (labels.count(l), -labels.index(l)))
+            self.assertEqual(classifier.classify(example=e), expected)
+
+
+class TestSweep(unittest.TestCase):
+    """Unittest of the one pass k sweep over cross validation folds."""
+
+    def test_sweep_k(self):  # noqa
+        dataset = TrainTestSets(train_path=os.path.join(DATA, 'votes.mff')).train
+        evaluator = Evaluator(NearestNeighbor(dataset))
+        random.seed(3)
+        stdout, sys.stdout = sys.stdout, StringIO()
+        try:
+            accuracies = evaluator.sweep_k(5, k=4)
+        finally:
+            sys.stdout = stdout
+        random.seed(3)
+        folds = evaluator.assign_folds()
+        examples = list(dataset.examples)
+        for fold in xrange(4):
+            train = [e for e, f in zip(examples, folds) if f != fold]
+            test = [e for e, f in zip(examples, folds) if f == fold]
+            for k in xrange(1, 6):
+                classifier = NearestNeighbor(DataSet(dataset.attributes, train), k=k)
+                classifier.train()
+                correct = sum(1 for e in test if classifier.classify(example=e) == e[-1])
+                self.assertEqual(accuracies[k][fold], correct / float(len(test)))
+
+
+class TestIncremental(unittest.TestCase):
+    """Unittest of adding and removing training examples."""
+
+    def check(self, name, index):
+        """Updated classifiers must answer like one trained on the live examples."""
+        dataset = TrainTestSets(train_path=os.path.join(DATA, name)).train
+        examples = list(dataset.examples)
+        classifier = NearestNeighbor(k=5, index=index)
+        self.assertEqual(classifier.partial_fit(DataSet(dataset.attributes, examples[:40])),
+                         range(40))
+        for start in xrange(40, len(examples), 30):
+            added = classifier.add_examples(examples[start:start + 30])
+            self.assertEqual(added, range(start, min(start + 30, len(examples))))
+        removed = range(0, len(examples), 3)
+        classifier.remove_examples(removed)
+        self.assertEqual(classifier.live_size, len(examples) - len(removed))
+        live = [e for i, e in enumerate(examples) if i not in set(removed)]
+        rebuilt = NearestNeighbor(DataSet(dataset.attributes, live), k=5, index=index)
+        rebuilt.train()
+        classes = classifier.train_examples.get_class_value_at
+        for e in examples[::7]:
+            found = [(d, classes(i)) for d, i in classifier.search(e.values)]
+            self.assertEqual(found, [(d, rebuilt.train_examples.get_class_value_at(i))
+                                     for d, i in rebuilt.search(e.values)])
+            self.assertFalse(set(i for _, i in classifier.search(e.values)) & set(removed))
+
+    def test_brute_force(self):  # noqa
+        self.check('votes.mff', None)
+
+    def test_trees(self):  # noqa
+        self.check('iris-binary.mff', 'kdtree')
+        self.check('soybean.mff', 'vptree')
+
+    def test_sorted_inserts(self):  # noqa
+        rows = [[float(i), float(i % 7)] for i in xrange(3000)]
+        rnd = random.Random(5)
+        queries = [[rnd.uniform(0, 3000), rnd.uniform(0, 7)] for _ in xrange(50)]
+        for tree in (KDTree([]), VPTree([], [False, False])):
+            for row in rows:
+                tree.add(row)
+            self.assertTrue(tree.depth() < 20)
+            for q in queries:
+                expected = sorted((distance(q, row, [False, False]), i)
+                                  for i, row in enumerate(rows))[:3]
+                found = tree.query(q, 3)
+                self.assertEqual([i for _, i in found], [i for _, i in expected])
+
+    def test_errors(self):  # noqa
+        dataset = TrainTestSets(train_path=os.path.join(DATA, 'votes.mff')).train
+        classifier = NearestNeighbor(dataset)
+        classifier.remove_examples([3])
+        self.assertRaises(LogicError, classifier.remove_examples, [3])
+        self.assertRaises(LogicError, classifier.remove_examples, [dataset.examples_size])
+        classifier.train()  # tombstones survive retraining on the same examples
+        self.assertTrue(3 not in [i for _, i in classifier.search(dataset.examples[3].values)])
+
+
+class TestIndex(unittest.TestCase):
+    """Unittest of the spatial indexes, they must match brute force exactly."""
+
+    def test_ties(self):  # noqa
+        rnd = random.Random(1)
+        rows = [[float(rnd.randint(0, 3)) for _ in xrange(3)] for _ in xrange(500)]
+        nominal = [False, True, False]
+        kdtree, vptree = KDTree(rows, leaf_size=4), VPTree(rows, nominal, leaf_size=4)
+        for query in rows[:50]:
+            expected = sorted((distance(query, row, [False] * 3), i) for i, row in enumerate(rows))
+            self.assertEqual(kdtree.query(query, 7), expected[:7])
+            expected = sorted((distance(query, row, nominal), i) for i, row in enumerate(rows))
+            self.assertEqual(vptree.query(query, 7), expected[:7])
+
+    def test_nearest_neighbor(self):  # noqa
+        dataset = TrainTestSets(train_path=os.path.join(DATA, 'iris-binary.mff')).train
+        queries = list(dataset.examples)[::10]
+        expected = [scan(NearestNeighbor(dataset, k=5), e) for e in queries]
+        for index in NearestNeighbor.INDEXES:
+            indexed = NearestNeighbor(dataset, k=5, index=index)
+            indexed.train()
+            self.assertEqual([indexed.find_neighbor(e) for e in queries], expected)
+
+    def test_lsh(self):  # noqa
+        dataset = TrainTestSets(train_path=os.path.join(DATA, 'soybean.mff')).train
+        exact = NearestNeighbor(dataset, k=5)
+        expected = exact.kneighbors(dataset)
+        recalls = []
+        for tables in (1, 20):
+            approximate = NearestNeighbor(dataset, k=5, index='lsh', tables=tables)
+            approximate.train()
+            self.assertTrue(isinstance(approximate._index, LSHIndex))
+            found = approximate.kneighbors(dataset)
+            self.assertTrue(all(len(n) == 5 for n in found))
+            recalls.append(sum(len(set(a) & set(b)) for a, b in zip(found, expected)))
+        self.assertTrue(recalls[0] < recalls[1])
+        self.assertTrue(recalls[1] > 0.95 * 5 * dataset.examples_size)
+
+    def test_errors(self):  # noqa
+        self.assertRaises(LogicError, NearestNeighbor, None, 3, 'balltree')
+        dataset = TrainTestSets(train_path=os.path.join(DATA, 'soybean.mff')).train
+        self.assertRaises(LogicError, NearestNeighbor(dataset, index='kdtree').train)
+        indexed = NearestNeighbor(dataset, index='auto')
+        indexed.train()
+        self.assertTrue(isinstance(indexed._index, VPTree))
+
+
+if __name__ == '__main__':
+    unittest.main()  # noqa
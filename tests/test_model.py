@@ -0,0 +1,96 @@
+"""Saved model tests."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from all_exceptions import LogicError
+from bayes import NaiveBayes
+from classifier import Classifier
+from DT import DecisionTree
+from kNN import NearestNeighbor
+from neuralnetwork import NeuralNetwork
+from traintestsets import TrainTestSets
+
+
+TESTS = os.path.dirname(os.path.abspath(__file__))
+DATA = os.path.join(TESTS, 'test_data')
+
+
+class TestModel(unittest.TestCase):
+    """Unittest of Classifier.save and Classifier.load."""
+
+    def setUp(self):  # noqa
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'model.bppm')
+
+    def tearDown(self):  # noqa
+        shutil.rmtree(self.tmp)
+
+    def dataset(self, name, sparse=None, directory=DATA):
+        """Return the training set of test data `name`, normalized unless sparse is None."""
+        dataset = TrainTestSets(train_path=os.path.join(directory, name)).train
+        if sparse is not None:
+            dataset.normalize_attributes(sparse=sparse)
+        return dataset
+
+    def round_trip(self, classifier, dataset):
+        """Save and load `classifier`, both must classify `dataset` alike."""
+        expected = [classifier.classify(example=e) for e in dataset.examples]
+        classifier.save(self.path)
+        loaded = Classifier.load(self.path)
+        self.assertTrue(type(loaded) is type(classifier))
+        self.assertEqual(str(loaded.trainset.attributes), str(dataset.attributes))
+        self.assertEqual([loaded.classify(example=e) for e in dataset.examples], expected)
+        fresh = type(classifier)(dataset)  # loading runs __init__ too
+        self.assertTrue(set(vars(fresh)) <= set(vars(loaded)))
+        self.assertTrue(loaded.testset is None)
+        return loaded
+
+    def test_decision_tree(self):  # noqa
+        for name in ('votes.mff', 'bikes.mff'):
+            dataset = self.dataset(name)
+            tree = DecisionTree(dataset, max_depth=4)
+            tree.train()
+            loaded = self.round_trip(tree, dataset)
+            self.assertEqual(loaded.max_depth, 4)
+            self.assertEqual(loaded.classify_batch(dataset), tree.classify_batch(dataset))
+
+    def test_nearest_neighbor(self):  # noqa
+        for sparse in (False, True):
+            dataset = self.dataset('lenses.mff', sparse, TESTS)
+            loaded = self.round_trip(NearestNeighbor(dataset, k=3), dataset)
+            self.assertEqual(loaded.k, 3)
+            self.assertEqual(loaded.trainset.preprocessor.to_dict(),
+                             dataset.preprocessor.to_dict())
+
+    def test_neural_network(self):  # noqa
+        dataset = self.dataset('iris-binary.mff', False)
+        network = NeuralNetwork(dataset, j=3, max_error=5.0)
+        network._train(print_results=False)
+        loaded = self.round_trip(network, dataset)
+        self.assertEqual(loaded.W, network.W)
+        self.assertEqual(loaded.V, network.V)
+
+    def test_naive_bayes(self):  # noqa
+        dataset = self.dataset('votes.mff')
+        bayes = NaiveBayes(dataset)
+        bayes.train()
+        loaded = self.round_trip(bayes, dataset)
+        self.assertEqual(loaded.total_examples, dataset.examples_size)
+        self.assertEqual(loaded.counts, bayes.counts)
+
+    def test_errors(self):  # noqa
+        self.assertRaises(LogicError, NeuralNetwork(self.dataset('votes.mff')).save, self.path)
+        tree = DecisionTree(self.dataset('votes.mff'))
+        tree.train()
+        tree.save(self.path)
+        self.assertRaises(LogicError, NearestNeighbor.load, self.path)
+        with open(self.path, 'r+b') as f:
+            f.write('XXXX')
+        self.assertRaises(LogicError, Classifier.load, self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()  # noqa
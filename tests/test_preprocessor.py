@@ -0,0 +1,77 @@
+"""Preprocessor tests."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from all_exceptions import LogicError
+from preprocessor import Preprocessor
+from reader import MffReader
+from traintestsets import TrainTestSets
+
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test_data')
+
+
+class TestPreprocessor(unittest.TestCase):
+    """Unittest of the fitted preprocessing pipeline."""
+
+    path = os.path.join(DATA, 'bikes.mff')
+
+    def setUp(self):
+        """Fit on bikes."""
+        self.tmp = tempfile.mkdtemp()
+        self.dataset = TrainTestSets(train_path=self.path).train
+        self.preprocessor = Preprocessor().fit(self.dataset)
+
+    def tearDown(self):  # noqa
+        shutil.rmtree(self.tmp)
+
+    def test_transform_dataset(self):  # noqa
+        before = str(self.dataset)
+        transformed = self.preprocessor.transform(self.dataset)
+        self.assertEqual(str(self.dataset), before)
+        self.assertEqual(transformed.attributes_size, 10)
+        self.assertAlmostEqual(transformed.examples.mean(8), 0.0)
+        self.assertAlmostEqual(transformed.examples.stdev(8), 1.0)
+
+    def test_transform_example_and_chunk(self):  # noqa
+        transformed = self.preprocessor.transform(self.dataset)
+        example = self.preprocessor.transform(self.dataset.examples[2])
+        self.assertEqual(list(example), transformed.examples[2].values)
+        chunk = next(MffReader(self.path).chunks(chunk_size=3))
+        block = self.preprocessor.transform(chunk)
+        self.assertEqual(block.size, 3)
+        self.assertEqual(block[1].values, transformed.examples[1].values)
+
+    def test_normalize_twice(self):  # noqa
+        self.dataset.normalize_attributes()
+        once = str(self.dataset)
+        self.dataset.normalize_attributes()
+        self.assertEqual(str(self.dataset), once)
+
+    def test_test_set_uses_train_statistics(self):  # noqa
+        test = TrainTestSets(train_path=self.path).train
+        test.examples.examples = test.examples.examples[:2]
+        preprocessor = self.dataset.normalize_attributes()
+        test.normalize_attributes(preprocessor)
+        self.assertEqual(test.examples[1].values, self.dataset.examples[1].values)
+
+    def test_schema_mismatch(self):  # noqa
+        other = TrainTestSets(train_path=os.path.join(DATA, 'votes.mff')).train
+        self.assertRaises(LogicError, self.preprocessor.transform, other)
+        self.assertRaises(LogicError, self.preprocessor.transform, other.examples)
+        self.assertRaises(LogicError, self.preprocessor.transform, other.examples[0])
+        self.assertRaises(LogicError, self.preprocessor.transform, [other.examples[0].values])
+
+    def test_save_load(self):  # noqa
+        path = os.path.join(self.tmp, 'bikes.json')
+        self.preprocessor.save(path)
+        loaded = Preprocessor.load(path)
+        self.assertEqual(str(loaded.transform(self.dataset)),
+                         str(self.preprocessor.transform(self.dataset)))
+
+
+if __name__ == '__main__':
+    unittest.main()  # noqa
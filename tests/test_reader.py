@@ -0,0 +1,61 @@
+"""MffReader tests."""
+
+import os
+import unittest
+
+from reader import MffReader
+from bayes import NaiveBayes
+from traintestsets import TrainTestSets
+
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test_data')
+
+
+class TestMffReader(unittest.TestCase):
+    """Unittest of the streaming .mff reader."""
+
+    path = os.path.join(DATA, 'votes.mff')
+
+    def setUp(self):
+        """Open votes."""
+        self.reader = MffReader(self.path, chunk_size=100)
+        self.dataset = TrainTestSets(train_path=self.path).train
+
+    def test_header(self):  # noqa
+        self.assertEqual(self.reader.name, 'house-votes-84')
+        self.assertEqual(self.reader.attributes.size, self.dataset.attributes_size)
+
+    def test_chunks(self):  # noqa
+        chunks = list(self.reader.chunks())
+        self.assertEqual([len(c) for c in chunks], [100, 100, 100, 100, 35])
+        rows = [row for chunk in chunks for row in chunk]
+        self.assertEqual(rows, [e.values for e in self.dataset.examples])
+
+    def test_matrix_chunks(self):  # noqa
+        chunks = list(self.reader.chunks(chunk_size=200, matrix=True))
+        self.assertEqual([c.size for c in chunks], [200, 200, 35])
+        self.assertEqual(chunks[1][0].values, self.dataset.examples[200].values)
+
+    def test_bayes_counts(self):  # noqa
+        streamed = NaiveBayes(None).count_values(self.reader.chunks())
+        loaded = NaiveBayes(self.dataset).count_values()
+        self.assertEqual(streamed, loaded)
+
+    def test_byte_ranges(self):  # noqa
+        ranges = self.reader.byte_ranges(7)
+        self.assertEqual(ranges[0][0], self.reader.offset)
+        for (_, end), (start, _) in zip(ranges[:-1], ranges[1:]):
+            self.assertEqual(end, start)
+
+    def test_parallel(self):  # noqa
+        serial = self.reader.read(matrix=True)
+        parallel = self.reader.read(matrix=True, workers=3)
+        self.assertEqual(parallel.examples.matrix, serial.examples.matrix)
+        self.assertEqual(parallel.examples.classes, serial.examples.classes)
+        rows = self.reader.read(workers=2)
+        self.assertEqual([e.values for e in rows.examples],
+                         [e.values for e in self.dataset.examples])
+
+
+if __name__ == '__main__':
+    unittest.main()  # noqa
@@ -0,0 +1,90 @@
+"""Sparse examples tests."""
+
+import os
+import random
+import unittest
+
+from all_exceptions import LogicError
+from example import SparseExamples
+from kNN import NearestNeighbor
+from neuralnetwork import NeuralNetwork
+from traintestsets import TrainTestSets
+
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test_data')
+
+
+class TestSparseExamples(unittest.TestCase):
+    """Unittest of sparse one-hot encoded examples."""
+
+    path = os.path.join(DATA, 'mushroom.mff')
+
+    def setUp(self):
+        """Normalize mushroom densely and sparsely."""
+        self.dense = TrainTestSets(train_path=self.path).train
+        self.dense.normalize_attributes()
+        self.sparse = TrainTestSets(train_path=self.path).train
+        self.sparse.normalize_attributes(sparse=True)
+
+    def test_rows_match(self):  # noqa
+        self.assertTrue(isinstance(self.sparse.examples, SparseExamples))
+        nonzero = sum(1 for v in self.dense.examples.matrix if v != 0)
+        self.assertEqual(self.sparse.examples.nnz, nonzero)
+        for a, b in zip(self.dense.examples, self.sparse.examples):
+            self.assertEqual(a.values, b.values)
+            self.assertEqual(a[7], b[7])
+            self.assertEqual(a[-1], b[-1])
+        self.assertEqual(str(self.dense), str(self.sparse))
+
+    def test_classes(self):  # noqa
+        examples = self.sparse.examples
+        labels = list(examples.classes)
+        examples.classes = [1 - v for v in labels]
+        self.assertEqual(examples.classes.typecode, 'l')
+        self.assertEqual(list(examples.classes), [1 - v for v in labels])
+        examples.classes = [v + 0.5 for v in labels]
+        self.assertEqual(examples.classes.typecode, 'd')
+        self.assertEqual(examples[0][-1], labels[0] + 0.5)
+        self.assertRaises(LogicError, setattr, examples, 'classes', labels[1:])
+
+    def test_knn(self):  # noqa
+        dense = NearestNeighbor(self.dense, k=3)
+        sparse = NearestNeighbor(self.sparse, k=3)
+        for i in xrange(0, 100, 7):
+            a, b = self.dense.examples[i], self.sparse.examples[i]
+            self.assertEqual(dense.find_neighbor(a), sparse.find_neighbor(b))
+            self.assertAlmostEqual(dense.euclidean_dist(a, self.dense.examples[3], a.size),
+                                   sparse.euclidean_dist(b, self.sparse.examples[3], b.size))
+
+    def test_kneighbors(self):  # noqa
+        dense = NearestNeighbor(self.dense, k=4)
+        sparse = NearestNeighbor(self.sparse, k=4)
+        expected = dense.kneighbors(self.dense)
+        for found, pairs in zip(sparse.kneighbors(self.sparse), expected):
+            self.assertEqual([i for _, i in found], [i for _, i in pairs])
+            for (a, _), (b, _) in zip(found, pairs):
+                self.assertAlmostEqual(a, b)
+        found = sparse.kneighbors(self.sparse)[5]
+        self.assertEqual(sparse.search(self.dense.examples[5].values), found)
+        self.assertEqual(sparse.search(self.sparse.examples[5], k=2), expected[5][:2])
+
+    def test_network(self):  # noqa
+        outputs = []
+        for dataset in (self.dense, self.sparse):
+            network = NeuralNetwork(dataset)
+            network.P = dataset.examples_size
+            network.y = [0.0] * network.J
+            network.get_z_and_d()
+            random.seed(7)
+            network.init_weight_matrices()
+            network.step2(network.z[5])
+            network.step3(5)
+            network.bpp(5)
+            outputs.append((network.step2(network.z[9])[0], network.V[2][:]))
+        self.assertAlmostEqual(outputs[0][0], outputs[1][0])
+        for a, b in zip(outputs[0][1], outputs[1][1]):
+            self.assertAlmostEqual(a, b)
+
+
+if __name__ == '__main__':
+    unittest.main()  # noqa
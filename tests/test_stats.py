@@ -0,0 +1,45 @@
+"""ColumnStats tests."""
+
+import os
+import unittest
+
+from reader import MffReader
+from stats import ColumnStats
+from traintestsets import TrainTestSets
+
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test_data')
+
+
+class TestColumnStats(unittest.TestCase):
+    """Unittest of single pass column statistics."""
+
+    path = os.path.join(DATA, 'soybean.mff')
+
+    def setUp(self):
+        """Load soybean."""
+        self.examples = TrainTestSets(train_path=self.path).train.examples
+
+    def test_matches_two_pass(self):  # noqa
+        stats = self.examples.statistics()
+        self.assertEqual(stats.count, self.examples.size)
+        for i in xrange(self.examples.attributes.size):
+            column = self.examples.column(i)
+            self.assertAlmostEqual(stats.mean(i), self.examples.mean(i))
+            self.assertAlmostEqual(stats.stdev(i), self.examples.stdev(i))
+            self.assertEqual(stats.minimums[i], min(column))
+            self.assertEqual(stats.maximums[i], max(column))
+
+    def test_merge_chunks(self):  # noqa
+        stats = self.examples.statistics()
+        width = self.examples.attributes.size
+        merged = ColumnStats.from_chunks(MffReader(self.path).chunks(chunk_size=50), width)
+        self.assertEqual(merged.count, stats.count)
+        for i in xrange(width):
+            self.assertAlmostEqual(merged.mean(i), stats.mean(i))
+            self.assertAlmostEqual(merged.variance(i), stats.variance(i))
+            self.assertEqual(merged.minimums[i], stats.minimums[i])
+
+
+if __name__ == '__main__':
+    unittest.main()  # noqa
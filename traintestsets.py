@@ -3,13 +3,12 @@ TrainTestSets.py.
 
 Holds the DataSet class.
 """
-from attributes import Attributes
 import os
 
 from all_exceptions import LogicError
 
-from example import Examples
-from dataset import DataSet
+import cache
+from reader import MffReader
 
 
 class TrainTestSets(object):
@@ -18,9 +17,35 @@ class TrainTestSets(object):
     _train = None
     test_path = None
     train_path = None
+    matrix = False
+    use_cache = False
+    cache_dir = None
+    mapped = False
+    workers = 1
+    compact = False
 
-    def __init__(self, test_path=None, train_path=None, args=None):
-        """Initialize TrainTestSets with a testing filepath and training filepath."""
+    def __init__(self, test_path=None, train_path=None, args=None, matrix=False,
+                 use_cache=False, cache_dir=None, mapped=False, workers=1, compact=False):
+        """Initialize TrainTestSets with a testing filepath and training filepath.
+
+        Args:
+            matrix (bool): store examples in a MatrixExamples instead of a
+                list of Example objects.
+            use_cache (bool): load through a compiled binary copy of each file,
+                compiling it on first use (see cache.py).
+            cache_dir (str): where compiled files go, defaults to next to
+                the .mff file.
+            mapped (bool): open the examples as a read-only memory map of
+                the compiled file, shared by every process using it.
+            workers (int): number of processes used to parse the examples.
+            compact (bool): store examples as CompactExample rows.
+        """
+        self.matrix = matrix
+        self.use_cache = use_cache or mapped or cache_dir is not None
+        self.cache_dir = cache_dir
+        self.mapped = mapped
+        self.workers = workers
+        self.compact = compact
         if test_path or train_path:
             self.test_path = test_path
             self.train_path = train_path
@@ -95,22 +120,9 @@ class TrainTestSets(object):
     def _create_data_set(self, path):
         if not os.path.exists(path):
             raise Exception("LogicError: %s does not exist!" % path)
-        with open(path) as f:
-            attributes = Attributes()
-            at_examples = False
-            for line in f:
-                line = line.replace("\n", "")
-                if '@dataset' in line:
-                    l = line.split(" ")
-                    name = l[1]
-                if '@attribute' in line:
-                    attributes.parse(line)
-                if '@example' in line:
-                    at_examples = True
-                    examples = Examples(attributes)
-                    dataset = DataSet(name=name, attributes=attributes)
-                    continue
-                if at_examples and len(line) > 1:
-                    examples.parse(line)
-            dataset._examples = examples
-            return dataset
+        if self.use_cache:
+            return cache.load(path, cache_dir=self.cache_dir, matrix=self.matrix,
+                              mapped=self.mapped, workers=self.workers,
+                              compact=self.compact)
+        return MffReader(path).read(matrix=self.matrix, workers=self.workers,
+                                    compact=self.compact)